@@ -0,0 +1,21 @@
+# Auto-Newsletter : génération d'une newsletter quotidienne à partir de flux RSS, avec sélection et rédaction
+# par l'API OpenAI, puis publication sur un blog statique.
+# API publique : Config (réglages, Config.from_env()), Clients (clients OpenAI partagés), build_edition(config)
+# génère une édition, main() est le point d'entrée en ligne de commande (python -m auto_newsletter).
+# Les exports sont résolus à la première utilisation : « import auto_newsletter » ne charge aucune dépendance.
+_EXPORTS = {
+    "Config": "auto_newsletter.config",
+    "Clients": "auto_newsletter.clients",
+    "build_edition": "auto_newsletter.pipeline",
+    "main": "auto_newsletter.cli",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+
+    return getattr(importlib.import_module(_EXPORTS[name]), name)
@@ -0,0 +1,329 @@
+import contextlib
+import hashlib
+import html
+import json
+import os
+import re
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from auto_newsletter.matching import MIN_TOKEN_LENGTH, normalize_title
+from auto_newsletter.render import load_template, stylesheet
+from auto_newsletter.storage import open_db
+
+# Éditions par page d'archive : les pages sont remplies de la plus ancienne à la plus récente, une page pleine
+# ne change donc plus quand une nouvelle édition paraît
+PAGE_SIZE = 20
+# Éditions listées sur la page d'accueil et dans le flux Atom
+LATEST_SIZE = 10
+SUMMARY_LENGTH = 280
+ARCHIVE_DIRNAME = "archive"
+SEARCH_DIRNAME = "search"
+
+_EDITION_FILENAME = re.compile(r"^(\d{2})(\d{2})(\d{4})\.html$")
+_PAGE_TITLE = re.compile(r"<title>(.*?)</title>", re.DOTALL)
+_PAGE_INTRO = re.compile(r'<div class="intro">\s*<p>(.*?)</p>', re.DOTALL)
+_PAGE_ARTICLE = re.compile(r"<li class='article'><a href='(.*?)'>(?:<img [^>]*>)?(.*?)</a></li>")
+
+
+# Archive des éditions publiées sur chaque blog (un "site" par dossier), d'où sont régénérées les pages d'index
+class ArchiveStore:
+    def __init__(self, path):
+        # Transactions explicites : la mise à jour d'un site (ajout et pages régénérées) se fait sous un même verrou
+        self._db = open_db(path, isolation_level=None)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS editions ("
+            "site TEXT NOT NULL, date TEXT NOT NULL, filename TEXT NOT NULL, title TEXT NOT NULL, "
+            "summary TEXT NOT NULL, articles TEXT NOT NULL, updated INTEGER NOT NULL, PRIMARY KEY (site, date)"
+            ") WITHOUT ROWID"
+        )
+
+    # Verrou d'écriture exclusif le temps d'un bloc : les reconstructions parallèles (--backfill) s'exécutent
+    # l'une après l'autre et chacune régénère les pages à partir d'une archive à jour
+    @contextlib.contextmanager
+    def transaction(self):
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        self._db.execute("COMMIT")
+
+    # Ajouter ou remplacer l'édition d'une date ; renvoie vrai si elle remplace une édition existante
+    def add(self, site, edition, now=None):
+        replaced = self._db.execute(
+            "SELECT 1 FROM editions WHERE site = ? AND date = ?", (site, edition["date"])
+        ).fetchone() is not None
+        self._db.execute(
+            "INSERT OR REPLACE INTO editions (site, date, filename, title, summary, articles, updated) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (site, edition["date"], edition["filename"], edition["title"], edition["summary"],
+             json.dumps(edition["articles"], ensure_ascii=False), int(now if now is not None else time.time())),
+        )
+        return replaced
+
+    def count(self, site):
+        return self._db.execute("SELECT COUNT(*) FROM editions WHERE site = ?", (site,)).fetchone()[0]
+
+    # Rang d'une édition dans l'ordre chronologique (0 pour la plus ancienne)
+    def position(self, site, date):
+        return self._db.execute(
+            "SELECT COUNT(*) FROM editions WHERE site = ? AND date < ?", (site, date)
+        ).fetchone()[0]
+
+    def _select(self, where, parameters, order, limit=-1, offset=0):
+        rows = self._db.execute(
+            "SELECT date, filename, title, summary, articles, updated FROM editions "
+            f"WHERE {where} ORDER BY date {order} LIMIT ? OFFSET ?",
+            (*parameters, limit, offset),
+        )
+        return [
+            {"date": date, "filename": filename, "title": title, "summary": summary,
+             "articles": json.loads(articles), "updated": updated}
+            for date, filename, title, summary, articles, updated in rows
+        ]
+
+    # Éditions de la plus ancienne à la plus récente, à partir du rang offset
+    def oldest_first(self, site, offset=0, limit=-1):
+        return self._select("site = ?", (site,), "ASC", limit, offset)
+
+    def latest(self, site, limit):
+        return self._select("site = ?", (site,), "DESC", limit)
+
+    def year(self, site, year):
+        return self._select("site = ? AND date LIKE ?", (site, f"{year}-%"), "ASC")
+
+    def years(self, site):
+        rows = self._db.execute(
+            "SELECT DISTINCT substr(date, 1, 4) FROM editions WHERE site = ? ORDER BY 1", (site,)
+        )
+        return [row[0] for row in rows]
+
+    def close(self):
+        self._db.close()
+
+
+# Fonction pour décrire une édition telle qu'elle est archivée ; articles : [{"title", "link"}]
+def edition_record(newsletter_title, introduction, articles, edition_date):
+    return {
+        "date": edition_date.strftime("%Y-%m-%d"),
+        "filename": f"{edition_date.strftime('%d%m%Y')}.html",
+        "title": newsletter_title,
+        "summary": introduction.replace("**", "").strip(),
+        "articles": [{"title": article["title"], "link": article["link"]} for article in articles],
+    }
+
+
+# Fonction pour relire les éditions déjà présentes dans le dossier d'un blog, une seule fois, quand l'archive
+# de ce blog est encore vide (pages produites avant l'archive)
+def scan_existing_editions(directory):
+    editions = []
+    for filename in sorted(os.listdir(directory)):
+        match = _EDITION_FILENAME.match(filename)
+        if not match:
+            continue
+        day, month, year = match.groups()
+        try:
+            edition_date = datetime(int(year), int(month), int(day))
+            with open(os.path.join(directory, filename), encoding="utf-8") as file:
+                page = file.read()
+        except (ValueError, OSError):
+            continue
+        title = _PAGE_TITLE.search(page)
+        intro = _PAGE_INTRO.search(page)
+        editions.append(edition_record(
+            html.unescape(title.group(1).strip()) if title else filename,
+            html.unescape(intro.group(1).replace("<br>", "\n")) if intro else "",
+            [{"title": html.unescape(article_title), "link": html.unescape(link)}
+             for link, article_title in _PAGE_ARTICLE.findall(page)],
+            edition_date,
+        ))
+    return editions
+
+
+def _page_count(count):
+    return max(1, -(-count // PAGE_SIZE))
+
+
+def _page_filename(number):
+    return f"page-{number}.html"
+
+
+# Fonction pour écrire un fichier de façon atomique, seulement si son contenu change ; renvoie son chemin s'il
+# a été écrit, sinon None (le dépôt du blog ne reçoit ainsi que les fichiers réellement modifiés)
+def _write_if_changed(path, content):
+    data = content.encode("utf-8")
+    try:
+        with open(path, "rb") as file:
+            if file.read() == data:
+                return None
+    except OSError:
+        pass
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return path
+
+
+def _summary(edition):
+    summary = edition["summary"].replace("\n", " ")
+    if len(summary) > SUMMARY_LENGTH:
+        summary = summary[:SUMMARY_LENGTH].rsplit(" ", 1)[0] + "…"
+    return summary
+
+
+# Fonction pour produire les lignes de la liste des éditions ; prefix mène des pages d'archive aux éditions
+def _render_editions(editions, prefix=""):
+    row = load_template("edition.html")
+    return "\n".join(
+        row.substitute(
+            href=html.escape(prefix + edition["filename"]),
+            title=html.escape(edition["title"]),
+            date=edition["date"],
+            label=datetime.strptime(edition["date"], "%Y-%m-%d").strftime("%d/%m/%Y"),
+            summary=html.escape(_summary(edition)),
+        )
+        for edition in editions
+    )
+
+
+# Fonction pour produire les liens de navigation entre les pages d'archive (current : None sur l'accueil)
+def _render_pages(page_count, current=None):
+    prefix = "" if current is not None else f"{ARCHIVE_DIRNAME}/"
+    links = []
+    if current is not None:
+        links.append("            <a href='../index.html'>Dernières éditions</a>")
+        if current > 1:
+            links.append(f"            <a href='{_page_filename(current - 1)}' rel='prev'>Plus anciennes</a>")
+        if current < page_count:
+            links.append(f"            <a href='{_page_filename(current + 1)}' rel='next'>Plus récentes</a>")
+    else:
+        links.extend(
+            f"            <a href='{prefix}{_page_filename(number)}'>Archives {number}</a>"
+            for number in range(page_count, 0, -1)
+        )
+    return "\n".join(links)
+
+
+def _isoformat(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+# Fonction pour produire le flux Atom des dernières éditions (liens relatifs à base_url s'il est donné)
+def _render_feed(title, site_id, latest, base_url, author):
+    row = load_template("feed_entry.xml")
+    entries = "\n".join(
+        row.substitute(
+            title=html.escape(edition["title"]),
+            id=f"{site_id}:{edition['date']}",
+            updated=_isoformat(edition["updated"]),
+            href=html.escape(edition["filename"]),
+            summary=html.escape(_summary(edition)),
+        )
+        for edition in latest
+    )
+    return load_template("feed.xml").substitute(
+        base=f' xml:base="{html.escape(base_url)}"' if base_url else "",
+        title=html.escape(title),
+        id=site_id,
+        updated=_isoformat(max((edition["updated"] for edition in latest), default=0)),
+        author=html.escape(author),
+        entries=entries,
+    ) + "\n"
+
+
+# Fonction pour construire le fragment d'index de recherche d'une année : les éditions, puis pour chaque mot
+# normalisé la liste des éditions qui le contiennent (titre, introduction et titres des articles)
+def _render_search_shard(editions):
+    terms = {}
+    for index, edition in enumerate(editions):
+        text = " ".join([edition["title"], edition["summary"], *(article["title"] for article in edition["articles"])])
+        for token in set(normalize_title(text).split()):
+            if len(token) >= MIN_TOKEN_LENGTH:
+                terms.setdefault(token, []).append(index)
+    return json.dumps({
+        "editions": [[edition["filename"], edition["title"], edition["date"]] for edition in editions],
+        "terms": dict(sorted(terms.items())),
+    }, ensure_ascii=False, separators=(",", ":"))
+
+
+# Fonction pour archiver une édition du blog et régénérer seulement ce qu'elle modifie :
+# - la page d'archive qui la contient (et les suivantes si elle s'insère avant des éditions existantes,
+#   ainsi que la précédente si une nouvelle page est créée, pour son lien "Plus récentes") ;
+# - l'accueil et le flux Atom si elle fait partie des dernières éditions ou si le nombre de pages change ;
+# - le fragment de recherche de son année (et la liste des fragments si l'année est nouvelle).
+# L'identifiant du flux découle de l'adresse publique du blog si elle est connue (sinon du dossier local) :
+# il ne change pas quand le blog est généré depuis une autre machine. Renvoie les fichiers écrits.
+def update_archive(store, directory, edition, title="Newsletter", base_url=None, author=None, now=None):
+    site = os.path.abspath(directory)
+    identity = base_url.rstrip("/") if base_url else site
+    site_id = f"urn:auto-newsletter:{hashlib.sha256(identity.encode('utf-8')).hexdigest()[:16]}"
+    stylesheet_href, _ = stylesheet()
+    written = []
+
+    with store.transaction():
+        rebuild = store.count(site) == 0
+        if rebuild:
+            # Première édition archivée pour ce blog : les éditions déjà publiées sont reprises une fois
+            for existing in scan_existing_editions(directory):
+                store.add(site, existing, now=now)
+        count_before = store.count(site)
+        replaced = store.add(site, edition, now=now)
+        count = store.count(site)
+        position = store.position(site, edition["date"])
+        page_count = _page_count(count)
+        pages_grew = page_count > _page_count(count_before)
+
+        if rebuild:
+            pages = range(1, page_count + 1)
+        elif replaced:
+            pages = [position // PAGE_SIZE + 1]
+        else:
+            first = position // PAGE_SIZE + 1
+            pages = range(first - 1 if pages_grew and first > 1 else first, page_count + 1)
+        for number in pages:
+            editions = store.oldest_first(site, (number - 1) * PAGE_SIZE, PAGE_SIZE)
+            written.append(_write_if_changed(
+                os.path.join(directory, ARCHIVE_DIRNAME, _page_filename(number)),
+                load_template("archive_page.html").substitute(
+                    title=html.escape(f"{title} - Archives {number}"),
+                    stylesheet=f"../{stylesheet_href}",
+                    editions=_render_editions(editions, prefix="../"),
+                    pages=_render_pages(page_count, current=number),
+                ),
+            ))
+
+        if rebuild or pages_grew or position >= count - LATEST_SIZE:
+            latest = store.latest(site, LATEST_SIZE)
+            written.append(_write_if_changed(
+                os.path.join(directory, "index.html"),
+                load_template("blog_index.html").substitute(
+                    title=html.escape(title),
+                    stylesheet=stylesheet_href,
+                    editions=_render_editions(latest),
+                    pages=_render_pages(page_count),
+                ),
+            ))
+            written.append(_write_if_changed(os.path.join(directory, "feed.xml"),
+                                             _render_feed(title, site_id, latest, base_url, author or title)))
+
+        years = store.years(site)
+        for year in years:
+            if rebuild or year == edition["date"][:4]:
+                written.append(_write_if_changed(os.path.join(directory, SEARCH_DIRNAME, f"{year}.json"),
+                                                 _render_search_shard(store.year(site, year))))
+        written.append(_write_if_changed(
+            os.path.join(directory, SEARCH_DIRNAME, "index.json"),
+            json.dumps({"shards": [{"file": f"{year}.json"} for year in years]}, separators=(",", ":")),
+        ))
+
+    return [path for path in written if path is not None]
@@ -0,0 +1,56 @@
+import concurrent.futures
+import multiprocessing
+from datetime import date, timedelta
+
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_API_CONCURRENCY = 4
+
+
+# Fonction pour lire une date au format AAAA-MM-JJ
+def parse_day(value):
+    return date.fromisoformat(value)
+
+
+# Générateur des jours de l'intervalle [start, end], bornes incluses
+def iter_days(start, end):
+    day = start
+    while day <= end:
+        yield day
+        day += timedelta(days=1)
+
+
+# Fonction pour construire les éditions d'une plage de dates en parallèle, un jour par processus.
+# build_day(jour) doit être une fonction de module (sérialisable) ; worker_initializer reçoit un sémaphore
+# partagé par tous les processus, qui borne le nombre d'appels OpenAI simultanés quel que soit leur nombre,
+# les seaux de requêtes et de jetons partagés (débit OpenAI commun à tous les processus, ou None si
+# requests_per_minute n'est pas donné), puis les arguments de worker_initargs (sérialisables, par exemple
+# la configuration).
+def run_backfill(days, build_day, worker_initializer=None, max_workers=DEFAULT_MAX_WORKERS,
+                 api_concurrency=DEFAULT_API_CONCURRENCY, worker_initargs=(), requests_per_minute=None,
+                 tokens_per_minute=None):
+    from auto_newsletter.ratelimit import shared_bucket_state
+
+    # "spawn" : chaque processus repart d'un interpréteur propre, sans connexions SQLite héritées
+    context = multiprocessing.get_context("spawn")
+    api_semaphore = context.BoundedSemaphore(api_concurrency)
+    api_buckets = None
+    if requests_per_minute is not None and tokens_per_minute is not None:
+        # Sans seaux communs, chaque processus aurait son propre débit : N processus enverraient N fois le quota
+        api_buckets = (shared_bucket_state(context, requests_per_minute),
+                       shared_bucket_state(context, tokens_per_minute))
+    results = {}
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=context,
+        initializer=worker_initializer,
+        initargs=(api_semaphore, api_buckets, *worker_initargs) if worker_initializer else (),
+    ) as executor:
+        futures = {executor.submit(build_day, day): day for day in days}
+        for future in concurrent.futures.as_completed(futures):
+            day = futures[future]
+            try:
+                results[day] = future.result()
+            except Exception as e:
+                print(f"Échec de la génération de l'édition du {day.strftime('%d/%m/%Y')} : {e}")
+                results[day] = None
+    return results
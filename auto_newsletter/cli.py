@@ -0,0 +1,122 @@
+import argparse
+import os
+import signal
+from datetime import datetime
+
+from auto_newsletter.backfill import DEFAULT_API_CONCURRENCY, DEFAULT_MAX_WORKERS, iter_days, parse_day
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Génération de la newsletter quotidienne")
+    parser.add_argument("--backfill", nargs=2, type=parse_day, metavar=("DEBUT", "FIN"),
+                        help="reconstruire les éditions de DEBUT à FIN inclus (dates AAAA-MM-JJ)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_MAX_WORKERS,
+                        help="nombre de jours reconstruits en parallèle")
+    parser.add_argument("--api-concurrency", type=int, default=DEFAULT_API_CONCURRENCY,
+                        help="nombre maximal d'appels OpenAI simultanés, tous processus confondus")
+    parser.add_argument("--publish", action="store_true",
+                        help="publier toutes les éditions reconstruites en un seul commit")
+    parser.add_argument("--daemon", action="store_true",
+                        help="rester actif : relever les flux en continu et publier aux heures EDITION_TIMES")
+    parser.add_argument("--preview", nargs="?", type=int, const=8000, metavar="PORT",
+                        help="suivre la génération en direct dans le navigateur (http://127.0.0.1:PORT/, 8000 par défaut)")
+    parser.add_argument("--newsletters", metavar="FICHIER",
+                        help="construire toutes les newsletters décrites dans FICHIER (JSON), "
+                             "par défaut NEWSLETTERS_FILE")
+    return parser
+
+
+# Point d'entrée en ligne de commande : les arguments sont lus avant tout import lourd,
+# ce qui garde --help et les erreurs d'usage instantanés
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    from auto_newsletter.backfill import run_backfill
+    from auto_newsletter.clients import Clients
+    from auto_newsletter.config import Config
+    from auto_newsletter.instrumentation import profile
+    from auto_newsletter.pipeline import (
+        build_backfill_edition,
+        build_edition,
+        init_backfill_worker,
+        publish_files,
+        write_run_report,
+    )
+
+    config = Config.from_env()
+    tenants = None
+    newsletters_file = args.newsletters or config.newsletters_file
+    if newsletters_file:
+        from auto_newsletter.tenants import load_tenants
+
+        tenants = load_tenants(newsletters_file, config)
+
+    if args.preview is not None and (args.daemon or args.backfill or tenants):
+        build_parser().error("l'aperçu en direct ne s'applique qu'à la génération d'une seule édition")
+
+    if args.daemon:
+        from auto_newsletter.daemon import NewsletterDaemon
+
+        daemon = NewsletterDaemon(config, tenants=tenants)
+        # Arrêt propre sur SIGTERM (systemd, docker stop) comme sur Ctrl+C
+        signal.signal(signal.SIGTERM, lambda signum, frame: daemon.stop())
+        try:
+            daemon.run()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            daemon.close()
+    elif args.backfill:
+        if tenants:
+            build_parser().error("le rattrapage ne s'applique qu'à une seule newsletter (sans NEWSLETTERS_FILE)")
+        results = run_backfill(
+            iter_days(*args.backfill),
+            build_backfill_edition,
+            worker_initializer=init_backfill_worker,
+            worker_initargs=(config,),
+            max_workers=args.workers,
+            api_concurrency=args.api_concurrency,
+            requests_per_minute=config.openai_requests_per_minute,
+            tokens_per_minute=config.openai_tokens_per_minute,
+        )
+        built = sorted(day for day, files in results.items() if files)
+        print(f"{len(built)} édition(s) reconstruite(s) sur {len(results)} jour(s).")
+        if args.publish and built:
+            start, end = args.backfill
+            publish_files(
+                config,
+                [path for day in built for path in results[day]],
+                f"Auto-generated newsletters from {start.strftime('%d/%m/%Y')} to {end.strftime('%d/%m/%Y')}",
+            )
+    else:
+        clients = Clients(config)
+        preview = server = None
+        if args.preview is not None:
+            from auto_newsletter.preview import EditionPreview, PreviewServer
+
+            # Le serveur d'aperçu sert la page immédiatement ; les textes y arrivent au fil de la génération
+            preview = EditionPreview()
+            server = PreviewServer(preview, port=args.preview)
+            server.start()
+            print(f"Aperçu en direct : {server.url}")
+        # Profil cProfile optionnel (PROFILE=1), enregistré à côté des pages générées
+        profile_path = (os.path.join(config.newsletter_dir, f"{datetime.now().strftime('%d%m%Y')}.prof")
+                        if config.profile_enabled else None)
+        try:
+            with profile(profile_path):
+                if tenants:
+                    from auto_newsletter.tenants import build_all_editions
+
+                    build_all_editions(config, tenants, clients)
+                else:
+                    build_edition(config, clients, preview=preview)
+        finally:
+            write_run_report(config, clients)
+            if server is not None:
+                # Le serveur reste ouvert le temps que l'aperçu reçoive la fin de génération, puis s'arrête
+                print("Génération terminée ; l'aperçu s'arrête dès que la page est à jour (Ctrl+C pour l'arrêter).")
+                try:
+                    server.linger()
+                except KeyboardInterrupt:
+                    pass
+                server.close()
@@ -0,0 +1,69 @@
+import threading
+
+
+# Fonction pour créer le client OpenAI complet : limitation de débit et nouveaux essais, mesure des appels
+# et cache des réponses. api_semaphore borne les appels simultanés entre plusieurs processus et api_buckets
+# (seaux de requêtes et de jetons partagés) leur débit commun ; backend remplace le client du SDK
+# (faux client des bancs d'essai, serveur compatible).
+def create_openai_client(config, api_semaphore=None, backend=None, api_buckets=None):
+    from auto_newsletter.instrumentation import InstrumentedClient
+    from auto_newsletter.llm_cache import CachedClient
+    from auto_newsletter.ratelimit import RateLimitedClient
+
+    if backend is None:
+        from openai import OpenAI
+
+        # Les nouveaux essais sont gérés par RateLimitedClient, pas par le SDK
+        backend = OpenAI(api_key=config.openai_api_key, max_retries=0)
+    client = RateLimitedClient(
+        backend,
+        requests_per_minute=config.openai_requests_per_minute,
+        tokens_per_minute=config.openai_tokens_per_minute,
+        max_concurrency=config.openai_max_concurrency,
+        semaphore=api_semaphore,
+        timeout=config.openai_timeout,
+        max_retries=config.openai_max_retries,
+        shared_buckets=api_buckets,
+    )
+    # Mesure de la durée et des jetons de chaque appel réel (les réponses servies par le cache ne sont pas comptées)
+    client = InstrumentedClient(client)
+
+    # Cache des réponses OpenAI : une relance, un essai à blanc ou une retouche du gabarit ne coûte aucun appel
+    if config.llm_cache_enabled:
+        client = CachedClient(
+            client,
+            config.cache_path("llm.sqlite3"),
+            ttl_seconds=config.llm_cache_ttl_hours * 3600,
+            max_entries=config.llm_cache_max_entries,
+            replay_only=config.llm_replay_only,
+        )
+    return client
+
+
+# Clients partagés entre éditions, créés à la première utilisation : un processus de longue durée
+# conserve ainsi ses connexions ouvertes, et les commandes qui n'en ont pas besoin ne les créent jamais
+class Clients:
+    def __init__(self, config, api_semaphore=None, backend=None, api_buckets=None):
+        self.config = config
+        self.api_semaphore = api_semaphore
+        self.api_buckets = api_buckets
+        self.backend = backend
+        self._openai = None
+        self._lock = threading.Lock()
+
+    @property
+    def openai(self):
+        if self._openai is None:
+            with self._lock:
+                if self._openai is None:
+                    self._openai = create_openai_client(self.config, self.api_semaphore, self.backend,
+                                                         self.api_buckets)
+        return self._openai
+
+    # Statistiques du cache des réponses, si le cache est activé et le client déjà créé
+    def cache_stats(self):
+        from auto_newsletter.llm_cache import CachedClient
+
+        if isinstance(self._openai, CachedClient):
+            return {"llm_cache_hits": self._openai.hits, "llm_cache_misses": self._openai.misses}
+        return {}
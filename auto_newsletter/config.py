@@ -0,0 +1,132 @@
+import os
+from dataclasses import dataclass, field
+
+
+def _env_flag(name, default):
+    return os.getenv(name, default) == "1"
+
+
+# Configuration d'une édition ; from_env() lit le fichier .env et les variables d'environnement
+@dataclass
+class Config:
+    openai_api_key: str = None
+    feed_urls: list = field(default_factory=list)
+    feed_workers: int = 16
+    feed_timeout: float = 15.0
+    feed_poll_minutes: float = 15.0
+    feed_poll_max_minutes: float = 240.0
+    edition_times: list = field(default_factory=lambda: ["08:00"])
+    cache_dir: str = ".cache"
+    seen_retention_days: float = 30.0
+    entry_retention_days: float = 90.0
+    llm_cache_enabled: bool = True
+    llm_cache_ttl_hours: float = 12.0
+    llm_cache_max_entries: int = 5000
+    llm_replay_only: bool = False
+    selection_mode: str = "ids"
+    article_limit: int = 15
+    selection_audience: str = "un public professionnel sur LinkedIn"
+    score_retention_days: float = 7.0
+    # Ligne éditoriale ajoutée au rôle système des textes, et consignes de rédaction qui remplacent celles
+    # d'origine (titre, introduction, conclusion, post LinkedIn) ; None : textes d'origine
+    editorial_persona: str = None
+    title_instructions: str = None
+    introduction_instructions: str = None
+    conclusion_instructions: str = None
+    linkedin_instructions: str = None
+    ranking_token_budget: int = 6000
+    ranking_workers: int = 8
+    dedup_enabled: bool = True
+    dedup_threshold: float = 0.8
+    embeddings_backend: str = "hashing"
+    embedding_retention_days: float = 30.0
+    thumbnails_enabled: bool = True
+    thumbnail_cache_max_entries: int = 2000
+    openai_requests_per_minute: int = 500
+    openai_tokens_per_minute: int = 200000
+    openai_max_concurrency: int = 8
+    openai_timeout: float = 60.0
+    openai_max_retries: int = 5
+    profile_enabled: bool = False
+    # Chemins où les pages HTML seront enregistrées
+    newsletter_dir: str = "newsletter"
+    blog_dir: str = "C:\\Users\\pierr\\OneDrive\\Documents\\GitHub\\CV-2024\\newsletter-blog"
+    # Accueil, archives paginées, flux Atom et index de recherche du blog (voir auto_newsletter.archive)
+    archive_enabled: bool = True
+    blog_title: str = "Newsletter"
+    blog_base_url: str = None
+    # Auteur du flux Atom (élément obligatoire) ; None : le titre du blog
+    blog_author: str = None
+    publish_backend: str = "git"
+    publish_repo_dir: str = "C:/Users/pierr/OneDrive/Documents/GitHub/CV-2024"
+    publish_remote_url: str = None
+    publish_branch: str = "main"
+    publish_target_dir: str = None
+    git_token: str = None
+    # Fichier JSON décrivant plusieurs newsletters construites ensemble (voir auto_newsletter.tenants)
+    newsletters_file: str = None
+
+    @classmethod
+    def from_env(cls, dotenv=True):
+        if dotenv:
+            # Import différé : les commandes simples n'ont pas à payer le chargement de python-dotenv
+            from dotenv import load_dotenv
+            load_dotenv()
+
+        from auto_newsletter.feeds import load_feed_urls
+
+        return cls(
+            openai_api_key=os.getenv("OPENAI_API_KEY"),
+            feed_urls=load_feed_urls(),
+            feed_workers=int(os.getenv("FEED_WORKERS", "16")),
+            feed_timeout=float(os.getenv("FEED_TIMEOUT", "15")),
+            feed_poll_minutes=float(os.getenv("FEED_POLL_MINUTES", "15")),
+            feed_poll_max_minutes=float(os.getenv("FEED_POLL_MAX_MINUTES", "240")),
+            edition_times=[value for value in os.getenv("EDITION_TIMES", "08:00").split(",") if value.strip()],
+            cache_dir=os.getenv("CACHE_DIR", ".cache"),
+            seen_retention_days=float(os.getenv("SEEN_RETENTION_DAYS", "30")),
+            entry_retention_days=float(os.getenv("ENTRY_RETENTION_DAYS", "90")),
+            llm_cache_enabled=_env_flag("LLM_CACHE", "1"),
+            llm_cache_ttl_hours=float(os.getenv("LLM_CACHE_TTL_HOURS", "12")),
+            llm_cache_max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000")),
+            llm_replay_only=_env_flag("LLM_REPLAY_ONLY", "0"),
+            selection_mode=os.getenv("SELECTION_MODE", "ids"),
+            article_limit=int(os.getenv("ARTICLE_LIMIT", "15")),
+            selection_audience=os.getenv("SELECTION_AUDIENCE", cls.selection_audience),
+            score_retention_days=float(os.getenv("SCORE_RETENTION_DAYS", "7")),
+            editorial_persona=os.getenv("EDITORIAL_PERSONA") or None,
+            title_instructions=os.getenv("TITLE_INSTRUCTIONS") or None,
+            introduction_instructions=os.getenv("INTRODUCTION_INSTRUCTIONS") or None,
+            conclusion_instructions=os.getenv("CONCLUSION_INSTRUCTIONS") or None,
+            linkedin_instructions=os.getenv("LINKEDIN_INSTRUCTIONS") or None,
+            ranking_token_budget=int(os.getenv("RANKING_TOKEN_BUDGET", "6000")),
+            ranking_workers=int(os.getenv("RANKING_WORKERS", "8")),
+            dedup_enabled=_env_flag("DEDUP", "1"),
+            dedup_threshold=float(os.getenv("DEDUP_THRESHOLD", "0.8")),
+            embeddings_backend=os.getenv("EMBEDDINGS", "hashing"),
+            embedding_retention_days=float(os.getenv("EMBEDDING_RETENTION_DAYS", "30")),
+            thumbnails_enabled=_env_flag("THUMBNAILS", "1"),
+            thumbnail_cache_max_entries=int(os.getenv("THUMBNAIL_CACHE_MAX_ENTRIES", "2000")),
+            openai_requests_per_minute=int(os.getenv("OPENAI_RPM", "500")),
+            openai_tokens_per_minute=int(os.getenv("OPENAI_TPM", "200000")),
+            openai_max_concurrency=int(os.getenv("OPENAI_MAX_CONCURRENCY", "8")),
+            openai_timeout=float(os.getenv("OPENAI_TIMEOUT", "60")),
+            openai_max_retries=int(os.getenv("OPENAI_MAX_RETRIES", "5")),
+            profile_enabled=_env_flag("PROFILE", "0"),
+            newsletter_dir=os.getenv("NEWSLETTER_DIR", cls.newsletter_dir),
+            blog_dir=os.getenv("BLOG_DIR", cls.blog_dir),
+            archive_enabled=_env_flag("ARCHIVE", "1"),
+            blog_title=os.getenv("BLOG_TITLE", cls.blog_title),
+            blog_base_url=os.getenv("BLOG_BASE_URL"),
+            blog_author=os.getenv("BLOG_AUTHOR") or None,
+            publish_backend=os.getenv("PUBLISH_BACKEND", "git"),
+            publish_repo_dir=os.getenv("PUBLISH_REPO_DIR", cls.publish_repo_dir),
+            publish_remote_url=os.getenv("PUBLISH_REMOTE_URL"),
+            publish_branch=os.getenv("PUBLISH_BRANCH", "main"),
+            publish_target_dir=os.getenv("PUBLISH_TARGET_DIR"),
+            git_token=os.getenv("GIT_TOKEN"),
+            newsletters_file=os.getenv("NEWSLETTERS_FILE"),
+        )
+
+    def cache_path(self, name):
+        return os.path.join(self.cache_dir, name)
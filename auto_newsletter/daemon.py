@@ -0,0 +1,202 @@
+import concurrent.futures
+import hashlib
+import heapq
+import itertools
+import threading
+import time
+from datetime import datetime, timedelta
+
+from auto_newsletter.clients import Clients
+from auto_newsletter.instrumentation import report
+
+
+# Fonction pour lire les heures d'édition ("HH:MM", heure locale), triées et sans doublon
+def parse_edition_times(values):
+    times = set()
+    for value in values:
+        try:
+            hour, minute = (int(part) for part in value.strip().split(":"))
+        except ValueError:
+            raise ValueError(f"Heure d'édition invalide : {value!r} (format attendu HH:MM)") from None
+        if not (0 <= hour < 24 and 0 <= minute < 60):
+            raise ValueError(f"Heure d'édition invalide : {value!r} (format attendu HH:MM)")
+        times.add((hour, minute))
+    if not times:
+        raise ValueError("Aucune heure d'édition configurée")
+    return sorted(times)
+
+
+# Fonction pour calculer la prochaine heure d'édition strictement après now
+def next_edition_time(edition_times, now):
+    for day in range(2):
+        date = (now + timedelta(days=day)).date()
+        for hour, minute in edition_times:
+            candidate = datetime(date.year, date.month, date.day, hour, minute)
+            if candidate > now:
+                return candidate
+    raise ValueError("Aucune heure d'édition configurée")
+
+
+# Fonction pour calculer l'empreinte du contenu d'un flux : deux réponses 200 aux mêmes articles ont la même
+def feed_signature(records):
+    digest = hashlib.blake2b(digest_size=16)
+    for record in records:
+        digest.update(repr((record.key, record.title, record.link, record.published, record.thumbnail)).encode())
+    return digest.digest()
+
+
+# Calendrier de relève des flux : chaque flux a son propre intervalle, qui double (jusqu'à max_interval)
+# tant que le flux ne change pas ou échoue, et revient à min_interval dès qu'il publie de nouveaux articles
+class FeedSchedule:
+    def __init__(self, feed_urls, min_interval, max_interval, now=None):
+        now = now if now is not None else time.monotonic()
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.intervals = {url: min_interval for url in feed_urls}
+        # Tas (échéance, ordre, URL) : l'ordre départage les échéances égales
+        self._counter = itertools.count()
+        self._heap = [(now, next(self._counter), url) for url in feed_urls]
+        heapq.heapify(self._heap)
+
+    # Échéance du prochain flux à relever (None si aucun flux)
+    def next_due(self):
+        return self._heap[0][0] if self._heap else None
+
+    # Retirer du calendrier et renvoyer les flux dont l'échéance est passée
+    def pop_due(self, now=None):
+        now = now if now is not None else time.monotonic()
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            due.append(heapq.heappop(self._heap)[2])
+        return due
+
+    def reschedule(self, feed_url, changed, now=None):
+        now = now if now is not None else time.monotonic()
+        interval = self.min_interval if changed else min(self.max_interval, self.intervals[feed_url] * 2)
+        self.intervals[feed_url] = interval
+        heapq.heappush(self._heap, (now + interval, next(self._counter), feed_url))
+
+
+# Processus de longue durée : le client OpenAI, les connexions HTTP, les flux analysés et les bases SQLite
+# restent ouverts d'une édition à l'autre. Les flux sont relevés selon leur propre intervalle et les éditions
+# sont construites aux heures prévues à partir des articles déjà en mémoire. Avec tenants ({nom: Config},
+# voir auto_newsletter.tenants), chaque flux commun n'est relevé qu'une fois pour toutes les newsletters.
+class NewsletterDaemon:
+    def __init__(self, config, clients=None, publish=True, tenants=None):
+        from auto_newsletter.entry_store import EntryStore
+        from auto_newsletter.feeds import FeedCache, HostConnectionPool
+        from auto_newsletter.seen import SeenIndex
+
+        self.config = config
+        self.clients = clients if clients is not None else Clients(config)
+        self.publish = publish
+        self.edition_times = parse_edition_times(config.edition_times)
+        self.pool = HostConnectionPool(timeout=config.feed_timeout)
+        self.feed_cache = FeedCache(config.cache_path("feeds"), keep_in_memory=True)
+        self.entry_store = EntryStore(config.cache_path("entries.sqlite3"), retention_days=config.entry_retention_days)
+        self.tenants = tenants
+        if tenants:
+            from auto_newsletter.tenants import seen_index_path, unique_feed_urls
+
+            feed_urls = unique_feed_urls(tenants)
+            self.seen_indexes = {name: SeenIndex(seen_index_path(tenant, name),
+                                                 retention_days=tenant.seen_retention_days)
+                                 for name, tenant in tenants.items()}
+        else:
+            feed_urls = config.feed_urls
+            self.seen_indexes = {None: SeenIndex(config.cache_path("seen.sqlite3"),
+                                                 retention_days=config.seen_retention_days)}
+        self.feed_cache.prune(set(feed_urls))
+        self.schedule = FeedSchedule(feed_urls, config.feed_poll_minutes * 60, config.feed_poll_max_minutes * 60)
+        # Derniers articles analysés de chaque flux et empreinte de leur contenu
+        self.records = {}
+        self.signatures = {}
+        # Index par date de tous ces articles, reconstruit seulement si un flux a changé depuis la dernière édition
+        self._recency = None
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=config.feed_workers)
+        self._stop = threading.Event()
+
+    # Relever les flux arrivés à échéance, en parallèle ; renvoie le nombre de flux ayant changé
+    def poll_feeds(self):
+        from auto_newsletter.feeds import fetch_feed
+
+        due = self.schedule.pop_due()
+        futures = {self._executor.submit(fetch_feed, url, self.pool, self.feed_cache): url for url in due}
+        changed = 0
+        for future in concurrent.futures.as_completed(futures):
+            url = futures[future]
+            try:
+                records = future.result()
+            except Exception as e:
+                print(f"Impossible de récupérer le flux {url} : {e}")
+                self.schedule.reschedule(url, changed=False)
+                continue
+            # Un flux inchangé (304) renvoie la liste déjà en mémoire : rien à archiver. Une réponse 200 (serveur
+            # sans ETag ni Last-Modified) n'est un changement que si le contenu diffère.
+            if records is self.records.get(url):
+                feed_changed = False
+            else:
+                signature = feed_signature(records)
+                feed_changed = signature != self.signatures.get(url)
+                self.records[url] = records
+                self.signatures[url] = signature
+            if feed_changed:
+                self._recency = None
+                for _ in self.entry_store.archive(records):
+                    pass
+                changed += 1
+            self.schedule.reschedule(url, changed=feed_changed)
+        return changed
+
+    # Construire l'édition à partir des articles en mémoire, puis écrire le rapport de la période écoulée
+    def run_edition(self):
+        from auto_newsletter.pipeline import build_edition_from_entries, write_run_report
+        from auto_newsletter.recency import RecencyIndex
+
+        try:
+            self.entry_store.evict()
+            for seen_index in self.seen_indexes.values():
+                seen_index.evict()
+            with report.stage("feeds"):
+                if self._recency is None:
+                    self._recency = RecencyIndex(itertools.chain.from_iterable(self.records.values()))
+                recent_entries = self._recency.recent()
+            report.set_counter("recent_entries", len(recent_entries))
+            if self.tenants:
+                from auto_newsletter.tenants import build_tenant_editions
+
+                return build_tenant_editions(self.tenants, self.clients, recent_entries, self.seen_indexes,
+                                             publish=self.publish)
+            return build_edition_from_entries(self.config, self.clients, recent_entries, self.seen_indexes[None],
+                                              publish=self.publish)
+        except Exception as e:
+            # Une édition ratée ne doit pas arrêter le processus : la suivante reprendra les mêmes articles
+            print(f"Échec de la génération de l'édition : {e}")
+            return None
+        finally:
+            write_run_report(self.config, self.clients)
+            report.reset()
+
+    # Boucle principale, jusqu'à l'appel de stop()
+    def run(self):
+        next_edition = next_edition_time(self.edition_times, datetime.now())
+        while not self._stop.is_set():
+            self.poll_feeds()
+            if datetime.now() >= next_edition:
+                self.run_edition()
+                next_edition = next_edition_time(self.edition_times, datetime.now())
+            wait = (next_edition - datetime.now()).total_seconds()
+            next_due = self.schedule.next_due()
+            if next_due is not None:
+                wait = min(wait, next_due - time.monotonic())
+            self._stop.wait(max(0.0, wait))
+
+    def stop(self):
+        self._stop.set()
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self.pool.close()
+        self.entry_store.close()
+        for seen_index in self.seen_indexes.values():
+            seen_index.close()
@@ -0,0 +1,170 @@
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from auto_newsletter.matching import normalize_title
+from auto_newsletter.storage import BATCH_SIZE, open_db
+
+DEFAULT_THRESHOLD = 0.8
+DEFAULT_DIMENSIONS = 2048
+DEFAULT_RETENTION_DAYS = 30
+# Taille des blocs de lignes de la matrice de similarité, pour borner la mémoire sur de grands volumes
+BLOCK_SIZE = 2048
+
+
+# Vecteurs locaux sans réseau : hachage des mots, paires de mots et trigrammes de caractères
+class HashingEmbedder:
+    def __init__(self, dimensions=DEFAULT_DIMENSIONS):
+        self.dimensions = dimensions
+        self.name = f"hashing-{dimensions}"
+
+    def _features(self, text):
+        words = normalize_title(text).split()
+        features = list(words)
+        features.extend(f"{first} {second}" for first, second in zip(words, words[1:]))
+        for word in words:
+            padded = f"#{word}#"
+            features.extend(padded[index:index + 3] for index in range(len(padded) - 2))
+        return features
+
+    def embed(self, texts):
+        matrix = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                # crc32 est stable d'une exécution à l'autre, contrairement à hash()
+                digest = zlib.crc32(feature.encode("utf-8"))
+                matrix[row, digest % self.dimensions] += 1.0 if digest & 0x80000000 else -1.0
+        return _normalize_rows(matrix)
+
+
+# Vecteurs de l'API OpenAI, plus robustes aux reformulations mais payants
+class OpenAIEmbedder:
+    def __init__(self, client, model="text-embedding-3-small", batch_size=256):
+        self.client = client
+        self.model = model
+        self.batch_size = batch_size
+        self.name = f"openai-{model}"
+
+    def embed(self, texts):
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            response = self.client.embeddings.create(model=self.model, input=texts[start:start + self.batch_size])
+            vectors.extend(item.embedding for item in response.data)
+        return _normalize_rows(np.asarray(vectors, dtype=np.float32).reshape(len(texts), -1))
+
+
+def _normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+# Cache disque des vecteurs, indexé par méthode de calcul et par article. Les vecteurs inutilisés depuis
+# retention_days jours (articles sortis des flux) sont supprimés par evict().
+class EmbeddingCache:
+    def __init__(self, path, retention_days=DEFAULT_RETENTION_DAYS):
+        self.retention_seconds = int(retention_days * 86400)
+        self._lock = threading.Lock()
+        self._db = open_db(path, check_same_thread=False)
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(embeddings)")}
+        if columns and "last_used" not in columns:
+            # Cache créé par une version sans date d'utilisation : il est simplement reconstruit
+            self._db.execute("DROP TABLE embeddings")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "embedder TEXT NOT NULL, key TEXT NOT NULL, vector BLOB NOT NULL, last_used INTEGER NOT NULL, "
+            "PRIMARY KEY (embedder, key)"
+            ") WITHOUT ROWID"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self._db.commit()
+
+    # Relire les vecteurs connus ; leur date d'utilisation est mise à jour pour les garder en cache
+    def get_many(self, embedder_name, keys, now=None):
+        now = int(now if now is not None else time.time())
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), BATCH_SIZE):
+                batch = keys[start:start + BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._db.execute(
+                    f"SELECT key, vector FROM embeddings WHERE embedder = ? AND key IN ({placeholders})",
+                    [embedder_name, *batch],
+                ).fetchall()
+                for key, vector in rows:
+                    found[key] = np.frombuffer(vector, dtype=np.float32)
+                self._db.execute(
+                    f"UPDATE embeddings SET last_used = ? WHERE embedder = ? AND key IN ({placeholders})",
+                    [now, embedder_name, *batch],
+                )
+            self._db.commit()
+        return found
+
+    def put_many(self, embedder_name, items, now=None):
+        now = int(now if now is not None else time.time())
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO embeddings (embedder, key, vector, last_used) VALUES (?, ?, ?, ?)",
+                ((embedder_name, key, vector.astype(np.float32).tobytes(), now) for key, vector in items),
+            )
+            self._db.commit()
+
+    # Supprimer les vecteurs inutilisés depuis plus longtemps que la durée de rétention
+    def evict(self, now=None):
+        now = int(now if now is not None else time.time())
+        with self._lock:
+            cursor = self._db.execute("DELETE FROM embeddings WHERE last_used < ?", (now - self.retention_seconds,))
+            self._db.commit()
+        return cursor.rowcount
+
+    def close(self):
+        self._db.close()
+
+
+# Fonction pour calculer (ou relire depuis le cache) la matrice des vecteurs des titres d'articles
+def embed_entries(entries, embedder, cache=None):
+    keys = [entry.key for entry in entries]
+    cached = cache.get_many(embedder.name, keys) if cache else {}
+    missing = [index for index, key in enumerate(keys) if key not in cached]
+    if missing:
+        vectors = embedder.embed([entries[index].title for index in missing])
+        computed = {keys[index]: vector for index, vector in zip(missing, vectors)}
+        if cache:
+            cache.put_many(embedder.name, computed.items())
+        cached.update(computed)
+    if not keys:
+        return np.zeros((0, 0), dtype=np.float32)
+    return np.vstack([cached[key] for key in keys])
+
+
+# Fonction pour regrouper les vecteurs dont la similarité cosinus dépasse le seuil (union-find)
+def cluster_duplicates(matrix, threshold=DEFAULT_THRESHOLD, block_size=BLOCK_SIZE):
+    parents = list(range(len(matrix)))
+
+    def find(index):
+        while parents[index] != index:
+            parents[index] = parents[parents[index]]
+            index = parents[index]
+        return index
+
+    for start in range(0, len(matrix), block_size):
+        # Les vecteurs sont normalisés : le produit matriciel donne directement les similarités cosinus
+        similarities = matrix[start:start + block_size] @ matrix.T
+        rows, columns = np.nonzero(similarities >= threshold)
+        for row, column in zip(rows + start, columns):
+            if column > row:
+                first, second = find(row), find(column)
+                if first != second:
+                    parents[max(first, second)] = min(first, second)
+    return [find(index) for index in range(len(matrix))]
+
+
+# Fonction pour ne garder qu'un article par groupe de titres quasi identiques (le premier rencontré)
+def deduplicate_entries(entries, embedder, cache=None, threshold=DEFAULT_THRESHOLD):
+    entries = list(entries)
+    if len(entries) < 2:
+        return entries
+    labels = cluster_duplicates(embed_entries(entries, embedder, cache), threshold)
+    return [entry for index, (entry, label) in enumerate(zip(entries, labels)) if label == index]
@@ -0,0 +1,57 @@
+import pickle
+import time
+
+from auto_newsletter.storage import BATCH_SIZE, open_db
+
+DEFAULT_RETENTION_DAYS = 90
+
+
+# Archive disque des articles normalisés, indexée par date de publication, pour reconstruire des éditions passées
+class EntryStore:
+    def __init__(self, path, retention_days=DEFAULT_RETENTION_DAYS):
+        self.retention_seconds = int(retention_days * 86400)
+        self._db = open_db(path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, published INTEGER, record BLOB NOT NULL)"
+            " WITHOUT ROWID"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_published ON entries (published)")
+        self._db.commit()
+
+    def _insert(self, records):
+        self._db.executemany(
+            "INSERT OR REPLACE INTO entries (key, published, record) VALUES (?, ?, ?)",
+            ((record.key, record.published, pickle.dumps(record, pickle.HIGHEST_PROTOCOL)) for record in records),
+        )
+        self._db.commit()
+
+    # Générateur archivant les articles au passage, par lots, sans interrompre le flux
+    def archive(self, records):
+        batch = []
+        for record in records:
+            if record.published is not None:
+                batch.append(record)
+                if len(batch) >= BATCH_SIZE:
+                    self._insert(batch)
+                    batch = []
+            yield record
+        if batch:
+            self._insert(batch)
+
+    # Articles publiés dans l'intervalle [start, end[ (epoch UTC), du plus récent au plus ancien
+    def entries_between(self, start, end):
+        rows = self._db.execute(
+            "SELECT record FROM entries WHERE published >= ? AND published < ? ORDER BY published DESC, key",
+            (int(start), int(end)),
+        )
+        return [pickle.loads(row[0]) for row in rows]
+
+    # Supprimer les articles plus anciens que la durée de rétention
+    def evict(self, now=None):
+        now = int(now if now is not None else time.time())
+        cursor = self._db.execute("DELETE FROM entries WHERE published < ?", (now - self.retention_seconds,))
+        self._db.commit()
+        return cursor.rowcount
+
+    def close(self):
+        self._db.close()
@@ -0,0 +1,268 @@
+import concurrent.futures
+import gzip
+import hashlib
+import http.client
+import os
+import pickle
+import tempfile
+import threading
+import urllib.parse
+import zlib
+from collections import defaultdict
+
+from auto_newsletter.instrumentation import report
+from auto_newsletter.records import assign_first_seen, iter_records
+
+DEFAULT_TIMEOUT = 15
+DEFAULT_MAX_WORKERS = 16
+DEFAULT_MAX_PER_HOST = 4
+MAX_REDIRECTS = 5
+USER_AGENT = "Auto-Newsletter/1.0 (+https://github.com/PierreTzt/Auto-Newsletter)"
+
+# Erreurs indiquant qu'une connexion keep-alive réutilisée a été fermée par le serveur
+_STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError)
+_READ_CHUNK_SIZE = 64 * 1024
+
+
+# Réponse dont le corps dépasse la taille maximale demandée
+class ResponseTooLarge(OSError):
+    pass
+
+
+# Fonction pour lire le corps d'une réponse par morceaux, en s'arrêtant dès que max_bytes est dépassé
+def _read_capped(response, max_bytes):
+    if max_bytes is None:
+        return response.read()
+    length = response.getheader("content-length", "")
+    if length.isdigit() and int(length) > max_bytes:
+        raise ResponseTooLarge(f"Réponse trop volumineuse ({length} octets)")
+    chunks, size = [], 0
+    while chunk := response.read(_READ_CHUNK_SIZE):
+        size += len(chunk)
+        if size > max_bytes:
+            raise ResponseTooLarge(f"Réponse trop volumineuse (plus de {max_bytes} octets)")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+# Fonction pour décompresser un corps gzip / deflate sans jamais produire plus de max_bytes octets
+def _decompress(body, encoding, max_bytes):
+    if encoding not in ("gzip", "deflate"):
+        return body
+    if max_bytes is None:
+        return gzip.decompress(body) if encoding == "gzip" else zlib.decompress(body)
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS if encoding == "gzip" else zlib.MAX_WBITS)
+    content = decompressor.decompress(body, max_bytes + 1)
+    if len(content) > max_bytes:
+        raise ResponseTooLarge(f"Réponse décompressée trop volumineuse (plus de {max_bytes} octets)")
+    return content + decompressor.flush()
+
+
+# Fonction pour charger la liste des flux RSS depuis l'environnement
+def load_feed_urls():
+    # FEEDS_FILE : fichier texte avec une URL par ligne (lignes vides et commentaires # ignorés)
+    # FEED_URLS : liste d'URL séparées par des virgules
+    # FEED_URL : ancien réglage à un seul flux, toujours accepté
+    feed_urls = []
+    feeds_file = os.getenv("FEEDS_FILE")
+    if feeds_file:
+        with open(feeds_file, encoding="utf-8") as file:
+            for line in file:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    feed_urls.append(line)
+    feed_urls.extend(url.strip() for url in os.getenv("FEED_URLS", "").split(",") if url.strip())
+    if os.getenv("FEED_URL"):
+        feed_urls.append(os.getenv("FEED_URL").strip())
+
+    # Supprimer les doublons en conservant l'ordre de déclaration
+    return list(dict.fromkeys(feed_urls))
+
+
+# Pool de connexions HTTP persistantes, réutilisées par hôte entre les téléchargements
+class HostConnectionPool:
+    def __init__(self, max_per_host=DEFAULT_MAX_PER_HOST, timeout=DEFAULT_TIMEOUT):
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self._idle = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def _acquire(self, key):
+        with self._lock:
+            if self._idle[key]:
+                return self._idle[key].pop(), True
+        scheme, host, port = key
+        connection_class = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return connection_class(host, port, timeout=self.timeout), False
+
+    def _release(self, key, connection):
+        with self._lock:
+            if len(self._idle[key]) < self.max_per_host:
+                self._idle[key].append(connection)
+                return
+        connection.close()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, defaultdict(list)
+        for connections in idle.values():
+            for connection in connections:
+                connection.close()
+
+    # Effectuer une requête GET en suivant les redirections, renvoie (statut, en-têtes, corps, URL finale).
+    # max_bytes borne la taille du corps, avant comme après décompression (ResponseTooLarge au-delà).
+    def get(self, url, headers=None, max_bytes=None):
+        for _ in range(MAX_REDIRECTS + 1):
+            status, response_headers, body = self._get_once(url, headers or {}, max_bytes)
+            location = response_headers.get("location")
+            if status in (301, 302, 303, 307, 308) and location:
+                url = urllib.parse.urljoin(url, location)
+                continue
+            return status, response_headers, body, url
+        raise http.client.HTTPException(f"Trop de redirections pour {url}")
+
+    def _get_once(self, url, headers, max_bytes=None):
+        parts = urllib.parse.urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            raise ValueError(f"Schéma non supporté : {url}")
+        key = (parts.scheme, parts.hostname, parts.port)
+        path = urllib.parse.urlunsplit(("", "", parts.path or "/", parts.query, ""))
+        request_headers = {"User-Agent": USER_AGENT, "Accept-Encoding": "gzip, deflate", **headers}
+
+        connection, reused = self._acquire(key)
+        try:
+            connection.request("GET", path, headers=request_headers)
+            response = connection.getresponse()
+            body = _read_capped(response, max_bytes)
+        except _STALE_CONNECTION_ERRORS:
+            connection.close()
+            if not reused:
+                raise
+            # La connexion inactive a expiré côté serveur : réessayer une fois sur une connexion neuve
+            return self._get_once(url, headers, max_bytes)
+        except Exception:
+            connection.close()
+            raise
+
+        if response.will_close:
+            connection.close()
+        else:
+            self._release(key, connection)
+
+        response_headers = {name.lower(): value for name, value in response.getheaders()}
+        encoding = response_headers.pop("content-encoding", "").lower()
+        return response.status, response_headers, _decompress(body, encoding, max_bytes)
+
+
+# Cache disque des flux : en-têtes ETag / Last-Modified et articles normalisés, un fichier par URL.
+# keep_in_memory garde aussi les entrées en mémoire (processus de longue durée) : un flux inchangé (304)
+# est alors servi sans relire ni désérialiser son fichier.
+class FeedCache:
+    def __init__(self, cache_dir, keep_in_memory=False):
+        self.cache_dir = cache_dir
+        self._memory = {} if keep_in_memory else None
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, feed_url):
+        digest = hashlib.sha256(feed_url.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.pickle")
+
+    def get(self, feed_url):
+        if self._memory is not None and feed_url in self._memory:
+            return self._memory[feed_url]
+        try:
+            with open(self._path(feed_url), "rb") as file:
+                record = pickle.load(file)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return None
+        # Les anciens fichiers contenaient les articles bruts de feedparser : ils sont ignorés
+        if "records" not in record:
+            return None
+        if self._memory is not None:
+            self._memory[feed_url] = record
+        return record
+
+    def set(self, feed_url, etag, last_modified, records):
+        record = {"etag": etag, "last_modified": last_modified, "records": records}
+        # Écriture atomique pour ne jamais laisser un fichier à moitié écrit
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                pickle.dump(record, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(feed_url))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        if self._memory is not None:
+            self._memory[feed_url] = record
+
+    # Supprimer le cache des flux qui ne font plus partie de la configuration ; renvoie le nombre de fichiers
+    def prune(self, feed_urls):
+        keep = {os.path.basename(self._path(url)) for url in feed_urls}
+        if self._memory is not None:
+            self._memory = {url: record for url, record in self._memory.items() if url in feed_urls}
+        removed = 0
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".pickle") and name not in keep:
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except FileNotFoundError:
+                    continue
+                removed += 1
+        return removed
+
+
+# Fonction pour télécharger un flux RSS via le pool de connexions et le normaliser en enregistrements compacts
+# L'analyse complète de feedparser est libérée dès la fin de la normalisation, dans le thread de téléchargement.
+def fetch_feed(feed_url, pool, cache=None):
+    # Import différé : feedparser n'est chargé que lorsqu'un flux est effectivement téléchargé
+    import feedparser
+
+    cached = cache.get(feed_url) if cache else None
+    headers = {}
+    if cached:
+        # Requête conditionnelle : le serveur répond 304 si le flux n'a pas changé
+        if cached["etag"]:
+            headers["If-None-Match"] = cached["etag"]
+        if cached["last_modified"]:
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    with report.stage("feed_fetch"):
+        status, response_headers, body, final_url = pool.get(feed_url, headers)
+    if status == 304 and cached:
+        return cached["records"]
+    if status != 200:
+        raise http.client.HTTPException(f"Statut HTTP {status} pour {feed_url}")
+
+    response_headers.setdefault("content-location", final_url)
+    with report.stage("feed_parse"):
+        records = list(iter_records(feedparser.parse(body, response_headers=response_headers).entries, feed_url))
+    # Les articles non datés gardent la date de leur première apparition : le flux est alors mis en cache
+    # même sans ETag ni Last-Modified, pour retrouver cette date au téléchargement suivant
+    first_seen = assign_first_seen(records, cached["records"] if cached else ())
+    if cache and (response_headers.get("etag") or response_headers.get("last-modified") or first_seen):
+        cache.set(feed_url, response_headers.get("etag"), response_headers.get("last-modified"), records)
+    return records
+
+
+# Générateur récupérant plusieurs flux RSS en parallèle et produisant leurs articles au fil de l'eau,
+# flux par flux dans l'ordre où ils arrivent
+def iter_feed_records(feed_urls, max_workers=DEFAULT_MAX_WORKERS, timeout=DEFAULT_TIMEOUT, pool=None, cache=None):
+    owns_pool = pool is None
+    if owns_pool:
+        pool = HostConnectionPool(timeout=timeout)
+
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(fetch_feed, url, pool, cache): url for url in feed_urls}
+            for future in concurrent.futures.as_completed(futures):
+                url = futures.pop(future)
+                try:
+                    records = future.result()
+                except Exception as e:
+                    print(f"Impossible de récupérer le flux {url} : {e}")
+                    continue
+                yield from records
+    finally:
+        if owns_pool:
+            pool.close()
@@ -0,0 +1,239 @@
+import hashlib
+import json
+from datetime import datetime
+
+from auto_newsletter.instrumentation import report
+
+# Fonction pour analyser les titres avec l'API OpenAI et sélectionner les plus engageants
+@report.timed("selection")
+def analyze_titles_with_openai(titles, client, limit, temperature):
+    prompt = (
+        f"Voici quelques titres d'articles :\n{titles}\n"
+        f"Veuillez sélectionner les {limit} meilleurs qui généreraient le plus d'engagement sur LinkedIn."
+    )
+    
+    response = client.chat.completions.create(
+        model="gpt-4o-mini-2024-07-18",
+        messages=[
+            {"role": "system", "content": "Vous êtes un expert en identification de contenu engageant pour LinkedIn."},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=temperature
+    )
+    
+    selected_titles = response.choices[0].message.content.strip().split("\n")
+    return [title.strip().replace("**", "").replace('"', '') for title in selected_titles if title.strip()]
+
+# Fonction pour sélectionner les articles les plus engageants par identifiant (réponse JSON structurée)
+@report.timed("selection")
+def select_entries_with_openai(entries, client, limit, temperature):
+    # Chaque titre est précédé d'un identifiant numérique stable : le modèle ne renvoie que des nombres,
+    # ce qui réduit les jetons de sortie et supprime la correspondance floue avec les titres réécrits
+    numbered_titles = "\n".join(f"{index}. {entry.title}" for index, entry in enumerate(entries))
+    prompt = (
+        f"Voici quelques titres d'articles, chacun précédé de son identifiant :\n{numbered_titles}\n"
+        f"Veuillez sélectionner les {limit} meilleurs qui généreraient le plus d'engagement sur LinkedIn. "
+        'Répondez uniquement avec un objet JSON de la forme {"ids": [identifiants par ordre de préférence]}.'
+    )
+
+    response = client.chat.completions.create(
+        model="gpt-4o-mini-2024-07-18",
+        messages=[
+            {"role": "system", "content": "Vous êtes un expert en identification de contenu engageant pour LinkedIn."},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=temperature,
+        response_format={"type": "json_object"}
+    )
+
+    try:
+        ids = json.loads(response.choices[0].message.content)["ids"]
+    except (ValueError, KeyError, TypeError):
+        print("La réponse de sélection n'est pas un JSON valide, aucun article sélectionné.")
+        return []
+
+    # Ignorer les identifiants inconnus ou répétés
+    selected_entries = []
+    selected_ids = set()
+    for entry_id in ids:
+        if isinstance(entry_id, int) and 0 <= entry_id < len(entries) and entry_id not in selected_ids:
+            selected_ids.add(entry_id)
+            selected_entries.append(entries[entry_id])
+    return selected_entries[:limit]
+
+# Modèle et consigne de notation : la clé de notation en dépend, une note n'est réutilisée que pour la même consigne
+SCORING_MODEL = "gpt-4o-mini-2024-07-18"
+DEFAULT_AUDIENCE = "un public professionnel sur LinkedIn"
+
+# Consigne de notation pour un public donné
+def scoring_instructions(audience):
+    return (
+        f"Notez de 0 à 100 l'intérêt de chaque titre pour {audience} : 100 pour un article qui générerait "
+        "énormément d'engagement, 0 pour un article sans intérêt. "
+        'Répondez uniquement avec un objet JSON de la forme {"scores": {"identifiant": note}}.'
+    )
+
+# Fonction pour calculer la clé de notation d'une consigne : les newsletters qui partagent leur public
+# partagent leurs notes
+def scoring_key(audience):
+    payload = json.dumps([SCORING_MODEL, scoring_instructions(audience)], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+# Fonction pour noter l'intérêt de chaque article d'un lot (réponse JSON structurée) ; renvoie {indice: note}.
+# La note est absolue, contrairement à la sélection des meilleurs : elle peut être réutilisée dans un autre lot.
+@report.timed("scoring")
+def score_entries_with_openai(entries, client, audience=DEFAULT_AUDIENCE):
+    numbered_titles = "\n".join(f"{index}. {entry.title}" for index, entry in enumerate(entries))
+    prompt = (
+        f"Voici quelques titres d'articles, chacun précédé de son identifiant :\n{numbered_titles}\n"
+        f"{scoring_instructions(audience)}"
+    )
+
+    response = client.chat.completions.create(
+        model=SCORING_MODEL,
+        messages=[
+            {"role": "system", "content": "Vous êtes un expert en identification de contenu engageant pour LinkedIn."},
+            {"role": "user", "content": prompt}
+        ],
+        # Température nulle : une note partagée doit être reproductible
+        temperature=0,
+        response_format={"type": "json_object"}
+    )
+
+    try:
+        raw_scores = json.loads(response.choices[0].message.content)["scores"]
+        raw_scores = raw_scores.items()
+    except (ValueError, KeyError, TypeError, AttributeError):
+        print("La réponse de notation n'est pas un JSON valide, aucun article noté.")
+        return {}
+
+    # Ignorer les identifiants inconnus et les notes non numériques
+    scores = {}
+    for entry_id, score in raw_scores:
+        try:
+            index = int(entry_id)
+            score = float(score)
+        except (TypeError, ValueError):
+            continue
+        if 0 <= index < len(entries):
+            scores[index] = max(0.0, min(100.0, score))
+    return scores
+
+# Fonction pour obtenir le texte d'une réponse. Avec on_text, la réponse est demandée en flux (stream=True) :
+# on_text reçoit le texte reçu jusque-là à chaque fragment, sans attendre la fin de la génération
+def complete_text(client, on_text=None, **parameters):
+    if on_text is None:
+        response = client.chat.completions.create(**parameters)
+        return response.choices[0].message.content
+
+    stream = client.chat.completions.create(stream=True, stream_options={"include_usage": True}, **parameters)
+    text = ""
+    for chunk in stream:
+        delta = chunk.choices[0].delta.content if chunk.choices else None
+        if delta:
+            text += delta
+            on_text(text)
+    return text
+
+# Consignes de rédaction par défaut ; chaque newsletter peut les remplacer (Config.*_instructions)
+TITLE_INSTRUCTIONS = "Le titre doit être concis, captivant et adapté à un public professionnel."
+INTRODUCTION_INSTRUCTIONS = (
+    "Rédigez une introduction engageante et concise pour cette newsletter quotidienne. "
+    "L'introduction doit évoquer les thèmes généraux des articles sans les énumérer directement, "
+    "et donner envie au lecteur de découvrir le contenu en détail. "
+    "Utilisez un ton professionnel avec une touche d'enthousiasme."
+)
+CONCLUSION_INSTRUCTIONS = "Rédigez une conclusion légèrement fun concise de 70 mots pour cette newsletter LinkedIn. Cette conclusion doit encourager les lecteurs à commenter, partager et s'engager avec le contenu, en mettant l'accent sur l'importance de leur participation pour enrichir la discussion. Si vous utilisez des hashtags, ils doivent être en anglais et apparaître sur une ligne séparée."
+LINKEDIN_INSTRUCTIONS = "Pour chaque titre, choisissez un emoji pertinent (qui doit être devant le titre) et présentez-le sous forme de liste à puces pour un post LinkedIn engageant. Ajoutez des hashtags en anglais à la fin."
+
+# Fonction pour compléter le rôle système d'un texte avec la ligne éditoriale de la newsletter (persona)
+def with_persona(system_prompt, persona=None):
+    return f"{system_prompt}\nLigne éditoriale de la newsletter : {persona}" if persona else system_prompt
+
+# Fonction pour générer un titre pour la newsletter
+@report.timed("newsletter_title")
+def generate_newsletter_title(client, top_titles, edition_date=None, on_text=None, instructions=None, persona=None):
+    prompt = (
+        f"Générez un titre percutant et engageant pour une newsletter basée sur les articles suivants :\n{', '.join(top_titles)}. "
+        + (instructions or TITLE_INSTRUCTIONS)
+    )
+    
+    content = complete_text(
+        client,
+        on_text,
+        model="gpt-4o-mini-2024-07-18",
+        messages=[
+            {"role": "system", "content": with_persona("Vous êtes un expert en rédaction de titres accrocheurs pour des newsletters professionnelles, capables de capter l'attention tout en restant pertinents pour une audience professionnelle.", persona)},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=0.7
+    )
+
+    # Ajouter la date du jour (ou de l'édition reconstruite) à la fin du titre
+    date_today = (edition_date or datetime.now()).strftime("%d/%m/%Y")
+    title = content.strip().replace('**', '').replace('"', '')
+    return f"{title} - {date_today}"
+
+# Fonction pour présenter l'édition dans un prompt : sa date et les articles retenus. Chaque édition a ainsi
+# son propre prompt (et sa propre entrée dans le cache des réponses), y compris en rattrapage.
+def edition_context(top_titles, edition_date=None):
+    date_label = (edition_date or datetime.now()).strftime("%d/%m/%Y")
+    return f"Édition du {date_label}, consacrée aux articles suivants :\n{', '.join(top_titles)}.\n"
+
+# Fonction pour générer l'introduction avec l'API OpenAI
+@report.timed("introduction")
+def generate_introduction(client, top_titles, edition_date=None, on_text=None, instructions=None, persona=None):
+    prompt = edition_context(top_titles, edition_date) + (instructions or INTRODUCTION_INSTRUCTIONS)
+    
+    content = complete_text(
+        client,
+        on_text,
+        model="gpt-4o-mini-2024-07-18",
+        messages=[
+            {"role": "system", "content": with_persona("Vous êtes un expert en rédaction de newsletters impactantes, spécialisées pour un public professionnel sur LinkedIn. Votre mission est de captiver l'attention dès les premiers mots, tout en offrant une valeur immédiate aux lecteurs.", persona)},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=0.4
+    )
+    
+    return content.strip().replace("**", "")
+
+# Fonction pour générer la conclusion avec l'API OpenAI
+@report.timed("conclusion")
+def generate_conclusion(client, top_titles, edition_date=None, on_text=None, instructions=None, persona=None):
+    prompt = edition_context(top_titles, edition_date) + (instructions or CONCLUSION_INSTRUCTIONS)
+    
+    content = complete_text(
+        client,
+        on_text,
+        model="gpt-4o-mini-2024-07-18",
+        messages=[
+            {"role": "system", "content": with_persona("Vous êtes un expert en rédaction de newsletters convaincantes et engageantes, spécialement conçues pour un public professionnel sur LinkedIn. Votre mission est de créer des conclusions qui non seulement résonnent avec les lecteurs, mais les incitent aussi à interagir activement.", persona)},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=0.4
+    )
+    
+    return content.strip().replace("**", "")
+
+# Fonction pour générer le post LinkedIn avec une liste à puces et des emojis générés dynamiquement
+@report.timed("linkedin_post")
+def generate_linkedin_post(client, top_titles, on_text=None, instructions=None, persona=None):
+    prompt = (
+        "Générez un post LinkedIn court (maximum 150 mots) pour promouvoir une newsletter quotidienne contenant les articles suivants :\n"
+        f"{', '.join(top_titles)}.\n"
+        + (instructions or LINKEDIN_INSTRUCTIONS)
+    )
+    
+    content = complete_text(
+        client,
+        on_text,
+        model="gpt-4o-mini-2024-07-18",
+        messages=[
+            {"role": "system", "content": with_persona("Vous êtes un expert en gestion des médias sociaux, spécialisé dans la création de posts LinkedIn engageants et stratégiques. Votre objectif est de promouvoir efficacement des contenus tout en maximisant l'interaction et la portée.", persona)},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=0.5
+    )
+    
+    return content.strip().replace("**", "")
@@ -0,0 +1,199 @@
+import contextlib
+import cProfile
+import functools
+import json
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+
+# Rapport d'exécution : durée de chaque étape, appels OpenAI (durée et jetons) et compteurs divers.
+# Les étapes exécutées dans plusieurs threads cumulent leurs durées : leur total peut dépasser la durée réelle.
+class RunReport:
+    def __init__(self):
+        self.started = time.time()
+        self.stages = {}
+        self.llm_calls = []
+        self.counters = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self.stages = {}
+            self.llm_calls = []
+            self.counters = {}
+
+    # Étape en cours dans le thread appelant, pour rattacher les appels OpenAI à leur étape
+    @property
+    def current_stage(self):
+        stack = getattr(self._local, "stack", None)
+        return stack[-1] if stack else None
+
+    # Gestionnaire de contexte mesurant la durée d'une étape
+    @contextlib.contextmanager
+    def stage(self, name):
+        stack = self._local.__dict__.setdefault("stack", [])
+        stack.append(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            with self._lock:
+                stage = self.stages.setdefault(name, {"calls": 0, "seconds": 0.0})
+                stage["calls"] += 1
+                stage["seconds"] += elapsed
+
+    # Décorateur mesurant chaque appel d'une fonction comme une étape
+    def timed(self, name=None):
+        def decorator(function):
+            stage_name = name or function.__name__
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.stage(stage_name):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    # first_token_seconds : délai avant le premier fragment d'une réponse en flux
+    def record_llm_call(self, model, usage, seconds, first_token_seconds=None):
+        call = {
+            "stage": self.current_stage,
+            "model": model,
+            "seconds": round(seconds, 4),
+            "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+            "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+            "total_tokens": getattr(usage, "total_tokens", 0) or 0,
+        }
+        if first_token_seconds is not None:
+            call["first_token_seconds"] = round(first_token_seconds, 4)
+        with self._lock:
+            self.llm_calls.append(call)
+
+    def set_counter(self, name, value):
+        with self._lock:
+            self.counters[name] = value
+
+    def to_dict(self):
+        with self._lock:
+            totals = {
+                name: sum(call[name] for call in self.llm_calls)
+                for name in ("prompt_tokens", "completion_tokens", "total_tokens")
+            }
+            return {
+                "started": self.started,
+                "duration_seconds": round(time.time() - self.started, 4),
+                "stages": {name: {"calls": stage["calls"], "seconds": round(stage["seconds"], 4)}
+                           for name, stage in self.stages.items()},
+                "llm": {"calls": len(self.llm_calls), **totals, "details": list(self.llm_calls)},
+                "counters": dict(self.counters),
+            }
+
+    def write_json(self, path):
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.to_dict(), file, ensure_ascii=False, indent=2)
+
+    # Ajouter le rapport à un historique JSONL, une ligne par exécution ; une seule écriture en mode ajout,
+    # pour que les lignes de processus concurrents ne s'entremêlent pas
+    def append_jsonl(self, path):
+        line = json.dumps(self.to_dict(), ensure_ascii=False, separators=(",", ":")) + "\n"
+        with open(path, "a", encoding="utf-8") as file:
+            file.write(line)
+
+    # Écrire le rapport au format texte de Prometheus (collecteur textfile de node_exporter)
+    def write_prometheus(self, path, prefix="newsletter"):
+        data = self.to_dict()
+        lines = [
+            f"# TYPE {prefix}_run_duration_seconds gauge",
+            f"{prefix}_run_duration_seconds {data['duration_seconds']}",
+            f"# TYPE {prefix}_run_timestamp_seconds gauge",
+            f"{prefix}_run_timestamp_seconds {data['started']}",
+            f"# TYPE {prefix}_stage_seconds gauge",
+        ]
+        lines.extend(f'{prefix}_stage_seconds{{stage="{name}"}} {stage["seconds"]}'
+                     for name, stage in data["stages"].items())
+        lines.append(f"# TYPE {prefix}_stage_calls gauge")
+        lines.extend(f'{prefix}_stage_calls{{stage="{name}"}} {stage["calls"]}'
+                     for name, stage in data["stages"].items())
+        lines.append(f"# TYPE {prefix}_llm_calls gauge")
+        lines.append(f"{prefix}_llm_calls {data['llm']['calls']}")
+        lines.append(f"# TYPE {prefix}_llm_tokens gauge")
+        lines.extend(f'{prefix}_llm_tokens{{kind="{kind}"}} {data["llm"][f"{kind}_tokens"]}'
+                     for kind in ("prompt", "completion", "total"))
+        lines.append(f"# TYPE {prefix}_counter gauge")
+        lines.extend(f'{prefix}_counter{{name="{name}"}} {value}' for name, value in data["counters"].items())
+
+        # Écriture atomique : le collecteur ne doit jamais lire un fichier partiel
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            file.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, path)
+
+
+# Rapport partagé par tous les modules du processus
+report = RunReport()
+
+
+# Gestionnaire de contexte activant cProfile et enregistrant les statistiques dans path (désactivé si path est vide)
+@contextlib.contextmanager
+def profile(path):
+    if not path:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+
+
+# Client enveloppant le client OpenAI : durée et jetons consommés (response.usage) de chaque appel réel,
+# textes (chat.completions.create) comme vecteurs (embeddings.create)
+class InstrumentedClient:
+    def __init__(self, client, run_report=report):
+        self.client = client
+        self.report = run_report
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create_chat_completion))
+        self.embeddings = SimpleNamespace(create=self._create_embeddings)
+
+    def _create_chat_completion(self, **parameters):
+        start = time.perf_counter()
+        response = self.client.chat.completions.create(**parameters)
+        if parameters.get("stream"):
+            return self._record_stream(parameters.get("model"), response, start)
+        self.report.record_llm_call(parameters.get("model"), getattr(response, "usage", None),
+                                    time.perf_counter() - start)
+        return response
+
+    def _create_embeddings(self, **parameters):
+        start = time.perf_counter()
+        response = self.client.embeddings.create(**parameters)
+        self.report.record_llm_call(parameters.get("model"), getattr(response, "usage", None),
+                                    time.perf_counter() - start)
+        return response
+
+    # Générateur transmettant une réponse en flux ; l'appel est enregistré à la fin du flux, avec l'usage
+    # du dernier fragment (stream_options={"include_usage": True}) et le délai du premier fragment
+    def _record_stream(self, model, stream, start):
+        usage = None
+        first_token_seconds = None
+        try:
+            for chunk in stream:
+                if first_token_seconds is None:
+                    first_token_seconds = time.perf_counter() - start
+                usage = getattr(chunk, "usage", None) or usage
+                yield chunk
+        finally:
+            self.report.record_llm_call(model, usage, time.perf_counter() - start, first_token_seconds)
+
+    def __getattr__(self, name):
+        if name == "client":
+            raise AttributeError(name)
+        return getattr(self.client, name)
@@ -0,0 +1,162 @@
+import hashlib
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+from auto_newsletter.storage import open_db
+
+DEFAULT_TTL_SECONDS = 12 * 3600
+DEFAULT_MAX_ENTRIES = 5000
+# Paramètres sans effet sur le contenu de la réponse, exclus de la clé de cache : une réponse reçue en flux
+# (stream=True) sert aussi la même requête sans flux, et inversement
+_IGNORED_PARAMETERS = {"timeout", "extra_headers", "stream", "stream_options"}
+
+
+# Erreur levée en mode relecture lorsqu'une requête n'a jamais été mise en cache
+class CacheMissError(LookupError):
+    pass
+
+
+# Fonction pour calculer la clé de cache d'une requête (modèle, messages, température et autres paramètres)
+def request_key(parameters):
+    relevant = {name: value for name, value in parameters.items() if name not in _IGNORED_PARAMETERS}
+    payload = json.dumps(relevant, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# Client enveloppant le client OpenAI : les réponses de chat.completions.create sont mises en cache sur disque,
+# avec expiration (TTL), éviction LRU au-delà de max_entries et un mode relecture seule sans appel réseau.
+class CachedClient:
+    def __init__(self, client, path, ttl_seconds=DEFAULT_TTL_SECONDS, max_entries=DEFAULT_MAX_ENTRIES,
+                 replay_only=False):
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.replay_only = replay_only
+        self.hits = 0
+        self.misses = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create_chat_completion))
+
+        self._lock = threading.Lock()
+        self._db = open_db(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, created INTEGER NOT NULL, last_used INTEGER NOT NULL"
+            ") WITHOUT ROWID"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        self._db.commit()
+
+    # Rechercher une réponse en cache ; les compteurs sont mis à jour sous le verrou (appels concurrents)
+    def _lookup(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+            expired = row is not None and self.ttl_seconds is not None and row[1] + self.ttl_seconds < now
+            if expired and not self.replay_only:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._db.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self._db.commit()
+        return row[0]
+
+    def _store(self, key, response):
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, response, created, last_used) VALUES (?, ?, ?, ?)",
+                (key, response, now, now),
+            )
+            # Éviction LRU, seulement une fois max_entries dépassé : ne conserver que les réponses utilisées
+            # le plus récemment
+            (count,) = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()
+            if count > self.max_entries:
+                self._db.execute(
+                    "DELETE FROM responses WHERE key NOT IN "
+                    "(SELECT key FROM responses ORDER BY last_used DESC LIMIT ?)",
+                    (self.max_entries,),
+                )
+            self._db.commit()
+
+    def _create_chat_completion(self, **parameters):
+        from openai.types.chat import ChatCompletion
+
+        key = request_key(parameters)
+        cached = self._lookup(key)
+        if cached is not None:
+            response = ChatCompletion.model_validate_json(cached)
+            return _chunks_from_completion(response) if parameters.get("stream") else response
+
+        if self.replay_only:
+            raise CacheMissError(f"Réponse absente du cache en mode relecture (modèle {parameters.get('model')})")
+        response = self.client.chat.completions.create(**parameters)
+        if parameters.get("stream"):
+            return self._store_stream(key, response)
+        self._store(key, response.model_dump_json())
+        return response
+
+    # Générateur transmettant les fragments d'une réponse en flux au fur et à mesure ; la réponse complète
+    # n'est mise en cache que si le flux a été lu jusqu'au bout
+    def _store_stream(self, key, stream):
+        chunks = []
+        for chunk in stream:
+            chunks.append(chunk)
+            yield chunk
+        self._store(key, _completion_from_chunks(chunks).model_dump_json())
+
+    # Les autres services du client (embeddings, etc.) sont transmis sans cache
+    def __getattr__(self, name):
+        if name == "client":
+            raise AttributeError(name)
+        return getattr(self.client, name)
+
+    def close(self):
+        self._db.close()
+
+
+# Fonction pour reconstituer la réponse complète à partir des fragments d'une réponse en flux
+def _completion_from_chunks(chunks):
+    from openai.types.chat import ChatCompletion
+
+    content = []
+    finish_reason = None
+    usage = None
+    for chunk in chunks:
+        for choice in chunk.choices:
+            content.append(choice.delta.content or "")
+            finish_reason = choice.finish_reason or finish_reason
+        usage = chunk.usage or usage
+    first = chunks[0] if chunks else None
+    return ChatCompletion.model_validate({
+        "id": first.id if first else "",
+        "object": "chat.completion",
+        "created": first.created if first else 0,
+        "model": first.model if first else "",
+        "choices": [{"index": 0, "finish_reason": finish_reason or "stop",
+                     "message": {"role": "assistant", "content": "".join(content)}}],
+        "usage": usage.model_dump() if usage else None,
+    })
+
+
+# Générateur rejouant une réponse en cache sous forme de flux : le texte, puis la fin de réponse et l'usage
+def _chunks_from_completion(response):
+    from openai.types.chat import ChatCompletionChunk
+
+    fields = {"id": response.id, "object": "chat.completion.chunk", "created": response.created,
+              "model": response.model}
+    yield ChatCompletionChunk.model_validate({
+        **fields,
+        "choices": [{"index": 0, "delta": {"role": "assistant", "content": response.choices[0].message.content},
+                     "finish_reason": None}],
+    })
+    yield ChatCompletionChunk.model_validate({
+        **fields,
+        "choices": [{"index": 0, "delta": {}, "finish_reason": response.choices[0].finish_reason}],
+        "usage": response.usage.model_dump() if response.usage else None,
+    })
@@ -0,0 +1,83 @@
+import re
+import unicodedata
+from collections import Counter, defaultdict
+
+# rapidfuzz offre le même score que fuzzywuzzy avec un calcul par lot en C ; fuzzywuzzy reste le repli
+try:
+    from rapidfuzz import fuzz, process
+except ImportError:
+    from fuzzywuzzy import fuzz, process
+
+DEFAULT_THRESHOLD = 60
+DEFAULT_MAX_CANDIDATES = 50
+# Les mots trop courts n'aident pas à distinguer les titres
+MIN_TOKEN_LENGTH = 3
+# Un mot présent dans plus de cette proportion des titres est ignoré pour la présélection
+MAX_TOKEN_FREQUENCY = 0.05
+
+_NON_ALPHANUMERIC = re.compile(r"[^0-9a-z]+")
+
+
+# Fonction pour normaliser un titre : minuscules, sans accents ni ponctuation, espaces uniques
+def normalize_title(title):
+    # La décomposition NFKD sépare les accents, supprimés ensuite par l'encodage ASCII
+    without_accents = unicodedata.normalize("NFKD", title.lower()).encode("ascii", "ignore").decode("ascii")
+    return _NON_ALPHANUMERIC.sub(" ", without_accents).strip()
+
+
+# Index des titres d'articles construit une seule fois : correspondance exacte sur le titre normalisé,
+# puis présélection par mots partagés, et score flou calculé uniquement sur une poignée de candidats.
+class TitleMatcher:
+    def __init__(self, entries, threshold=DEFAULT_THRESHOLD, max_candidates=DEFAULT_MAX_CANDIDATES):
+        self.entries = list(entries)
+        self.threshold = threshold
+        self.max_candidates = max_candidates
+        self._normalized = [normalize_title(entry.title) for entry in self.entries]
+        self._exact = {}
+        self._postings = defaultdict(list)
+        for index, normalized in enumerate(self._normalized):
+            self._exact.setdefault(normalized, index)
+            for token in set(normalized.split()):
+                if len(token) >= MIN_TOKEN_LENGTH:
+                    self._postings[token].append(index)
+        self._max_postings = max(1, int(len(self.entries) * MAX_TOKEN_FREQUENCY))
+        # Choix indexés par position : rapidfuzz et fuzzywuzzy renvoient alors tous deux (titre, score, indice)
+        self._choices = dict(enumerate(self._normalized))
+
+    def _candidates(self, normalized):
+        counts = Counter()
+        for token in set(normalized.split()):
+            postings = self._postings.get(token)
+            if postings and len(postings) <= self._max_postings:
+                counts.update(postings)
+        return [index for index, _ in counts.most_common(self.max_candidates)]
+
+    # Renvoyer l'indice de l'article le plus proche du titre, ou None sous le seuil
+    def match_index(self, title):
+        normalized = normalize_title(title)
+        if not normalized:
+            return None
+        if normalized in self._exact:
+            return self._exact[normalized]
+
+        candidates = self._candidates(normalized)
+        if candidates:
+            choices = {index: self._normalized[index] for index in candidates}
+            best = process.extractOne(normalized, choices, scorer=fuzz.ratio, score_cutoff=self.threshold)
+            if best:
+                return best[2]
+
+        # Aucun candidat suffisant (titre reformulé par le modèle) : comparaison avec tous les titres
+        best = process.extractOne(normalized, self._choices, scorer=fuzz.ratio, score_cutoff=self.threshold)
+        return best[2] if best else None
+
+    # Associer chaque titre sélectionné à un article, dans l'ordre de sélection et sans doublon
+    def match_all(self, titles):
+        matched = []
+        seen = set()
+        for title in titles:
+            index = self.match_index(title)
+            if index is not None and index not in seen:
+                seen.add(index)
+                matched.append(self.entries[index])
+        return matched
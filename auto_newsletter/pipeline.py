@@ -0,0 +1,447 @@
+import os
+import time
+from datetime import datetime, timedelta
+
+from auto_newsletter.clients import Clients
+from auto_newsletter.config import Config
+from auto_newsletter.instrumentation import report
+from auto_newsletter.recency import RECENT_WINDOW_SECONDS
+
+# Les modules lourds (feedparser, numpy, rapidfuzz, openai) sont importés dans les fonctions qui s'en servent :
+# importer ce module ne charge rien d'autre que la bibliothèque standard et ne crée aucune connexion.
+
+
+# Fonction pour filtrer les articles publiés dans les dernières 24 heures
+# Les articles arrivent au fil de l'eau depuis le générateur de flux : seuls les récents sont conservés.
+# Un parcours unique suffit ici ; les ensembles gardés en mémoire et interrogés plusieurs fois utilisent RecencyIndex.
+def filter_recent_articles(entries, now=None):
+    recent_entries = []
+    now = now if now is not None else time.time()
+    for entry in entries:
+        # Comparer la date de publication (epoch UTC) avec l'heure actuelle moins 24 heures
+        if entry.published is not None and now - RECENT_WINDOW_SECONDS <= entry.published <= now:
+            recent_entries.append(entry)
+    # Les flux arrivent dans un ordre variable : trier pour des prompts (et un cache) déterministes
+    recent_entries.sort(key=lambda entry: (-entry.published, entry.key))
+    return recent_entries
+
+
+# Fonction pour convertir un article du flux en article de la newsletter avec sa miniature
+# La miniature n'est extraite qu'ici, pour les seuls articles retenus
+def entry_to_article(entry):
+    return {
+        "title": entry.title,
+        "link": entry.link,
+        "thumbnail": entry.thumbnail
+    }
+
+
+# Fonction pour récupérer les articles et choisir la miniature avec correspondance floue
+@report.timed("title_matching")
+def get_top_articles_with_thumbnails(entries, top_titles, threshold=60):  # Réduire le seuil à 60
+    from auto_newsletter.matching import TitleMatcher
+
+    # L'index des titres évite de comparer chaque article à chaque titre sélectionné
+    matcher = TitleMatcher(entries, threshold=threshold)
+    return [entry_to_article(entry) for entry in matcher.match_all(top_titles)]
+
+
+# Fonction pour remplacer les miniatures distantes des articles retenus par des copies locales, réduites au format
+# des cartes et mises en cache : les lecteurs ne téléchargent plus les images en pleine taille depuis les sites
+# d'origine. Renvoie (articles avec le nom de leur miniature dans "image", fichiers copiés dans les dossiers).
+@report.timed("thumbnails")
+def prepare_thumbnails(config, top_articles):
+    if not config.thumbnails_enabled or not any(article["thumbnail"] for article in top_articles):
+        return top_articles, []
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        print("Pillow n'est pas installé : les miniatures ne sont pas affichées.")
+        return top_articles, []
+    from auto_newsletter.thumbnails import ThumbnailCache
+
+    cache = ThumbnailCache(config.cache_path("thumbnails"), max_entries=config.thumbnail_cache_max_entries)
+    try:
+        names = cache.fetch_all([article["thumbnail"] for article in top_articles],
+                                max_workers=config.feed_workers, timeout=config.feed_timeout)
+        available = list(dict.fromkeys(name for name in names if name))
+        newsletter_files = cache.export(available, config.newsletter_dir)
+        blog_files = cache.export(available, config.blog_dir)
+    finally:
+        cache.close()
+    # Une miniature qui n'a pas pu être copiée dans les deux dossiers n'est pas affichée
+    exported = {os.path.basename(path) for path in newsletter_files} & {os.path.basename(path) for path in blog_files}
+    names = [name if name in exported else None for name in names]
+    available = [name for name in available if name in exported]
+    files = [path for path in newsletter_files + blog_files if os.path.basename(path) in exported]
+    report.set_counter("thumbnails", len(available))
+    return [{**article, "image": name} for article, name in zip(top_articles, names)], files
+
+
+# Fonction pour générer la liste des articles sous forme de HTML
+def generate_article_list(top_articles):
+    from auto_newsletter.render import render_article_list
+
+    return render_article_list(top_articles)
+
+
+# Fonction pour enregistrer une page HTML datée du jour et sa feuille de style dans un dossier
+def save_html_page(save_path, html_content, edition_date=None):
+    from auto_newsletter.render import write_stylesheet
+
+    if not os.path.exists(save_path):
+        os.makedirs(save_path)
+    write_stylesheet(save_path)
+
+    # Générer le nom de fichier basé sur la date du jour (ou de l'édition reconstruite)
+    date_today = (edition_date or datetime.now()).strftime("%d%m%Y")
+    filename = os.path.join(save_path, f"{date_today}.html")
+
+    # Enregistrer le contenu HTML dans un fichier
+    with open(filename, "w", encoding="utf-8") as file:
+        file.write(html_content)
+    return filename
+
+
+# Fonction pour générer la page HTML avec les boutons de copie et le post LinkedIn, et la page HTML pour le blog
+# sans boutons ni post LinkedIn, en un seul rendu des gabarits compilés. Renvoie les fichiers écrits (pages et
+# feuilles de style).
+@report.timed("html_write")
+def generate_html_pages(config, newsletter_title, introduction, article_list_html, conclusion, linkedin_post,
+                        edition_date=None):
+    from auto_newsletter.render import render_edition, stylesheet
+
+    newsletter_html, blog_html = render_edition(newsletter_title, introduction, article_list_html, conclusion, linkedin_post)
+    stylesheet_path, _ = stylesheet()
+    return [
+        save_html_page(config.newsletter_dir, newsletter_html, edition_date),
+        os.path.join(config.newsletter_dir, stylesheet_path),
+        save_html_page(config.blog_dir, blog_html, edition_date),
+        os.path.join(config.blog_dir, stylesheet_path),
+    ]
+
+
+# Fonction pour ajouter l'édition à l'archive du blog et régénérer les pages qu'elle modifie (accueil, archives
+# paginées, flux Atom, index de recherche) sans relire les éditions précédentes. Renvoie les fichiers écrits.
+@report.timed("archive")
+def archive_edition(config, newsletter_title, introduction, articles, edition_date=None):
+    from auto_newsletter.archive import ArchiveStore, edition_record, update_archive
+
+    if not config.archive_enabled:
+        return []
+    store = ArchiveStore(config.cache_path("archive.sqlite3"))
+    try:
+        edition = edition_record(newsletter_title, introduction, articles, edition_date or datetime.now())
+        return update_archive(store, config.blog_dir, edition, title=config.blog_title,
+                              base_url=config.blog_base_url, author=config.blog_author)
+    finally:
+        store.close()
+
+
+# Fonction pour créer le publicateur du blog selon la configuration ; None seulement pour PUBLISH_BACKEND=none
+def create_publisher(config):
+    from auto_newsletter.publish import DirectoryPublisher, GitPublisher, PublishError
+
+    if config.publish_backend == "git":
+        if not (config.publish_remote_url or config.git_token):
+            raise PublishError("Aucun dépôt distant pour la publication (PUBLISH_REMOTE_URL ou GIT_TOKEN)")
+        # L'URL distante (avec le jeton) est construite une seule fois
+        remote_url = config.publish_remote_url or f"https://{config.git_token}@github.com/PierreTzt/CV-2024.git"
+        return GitPublisher(config.publish_repo_dir, remote_url, branch=config.publish_branch)
+    if config.publish_backend == "directory":
+        return DirectoryPublisher(config.publish_repo_dir, config.publish_target_dir)
+    if config.publish_backend == "none":
+        return None
+    raise PublishError(f"Mode de publication inconnu : {config.publish_backend!r} (git, directory ou none)")
+
+
+# Fonction pour publier les fichiers du blog produits par cette exécution, en un seul commit
+@report.timed("publish")
+def publish_files(config, files, commit_message):
+    from auto_newsletter.publish import PublishError
+
+    try:
+        # Une configuration incomplète (dossier de destination manquant...) est signalée comme un échec de publication
+        publisher = create_publisher(config)
+        if publisher is None:
+            return
+        # Seuls les fichiers du dépôt du blog sont publiés (pas la copie locale de la newsletter)
+        repo_dir = os.path.abspath(config.publish_repo_dir)
+        publisher.stage([os.path.abspath(path) for path in files
+                         if os.path.abspath(path).startswith(repo_dir + os.sep)])
+        if publisher.publish(commit_message):
+            print("Les fichiers ont été poussés avec succès sur le dépôt distant.")
+        else:
+            print("Aucun changement à publier.")
+    except PublishError as e:
+        print(f"Une erreur s'est produite lors de la publication : {e}")
+
+
+# Fonction pour sélectionner les articles par note d'intérêt : les notes déjà calculées pour la même consigne
+# (par une édition précédente ou une autre newsletter) sont réutilisées, seuls les nouveaux articles sont notés
+@report.timed("selection")
+def select_by_scores(config, client, entries):
+    from auto_newsletter.generation import score_entries_with_openai, scoring_key
+    from auto_newsletter.scores import ScoreStore, score_entries, top_scored
+
+    score_store = ScoreStore(config.cache_path("scores.sqlite3"), retention_days=config.score_retention_days)
+    try:
+        score_store.evict()
+        scores = score_entries(
+            entries,
+            lambda batch: score_entries_with_openai(batch, client, audience=config.selection_audience),
+            score_store,
+            scoring_key(config.selection_audience),
+            token_budget=config.ranking_token_budget,
+            max_workers=config.ranking_workers,
+        )
+    finally:
+        score_store.close()
+    return top_scored(entries, scores, config.article_limit)
+
+
+# Fonction pour composer une édition à partir des articles récents : déduplication, sélection, génération
+# des textes et écriture des pages HTML. Renvoie les fichiers écrits, ou une liste vide si rien n'est retenu.
+# preview (EditionPreview) reçoit chaque section au fil de sa génération.
+def compose_edition(config, clients, recent_entries, edition_date=None, preview=None):
+    from auto_newsletter.generation import (
+        analyze_titles_with_openai,
+        generate_conclusion,
+        generate_introduction,
+        generate_linkedin_post,
+        generate_newsletter_title,
+        select_entries_with_openai,
+    )
+    from auto_newsletter.ranking import tournament_select
+    from auto_newsletter.stages import run_dependency_graph
+
+    client = clients.openai
+
+    # Regrouper les articles quasi identiques (même sujet repris par plusieurs flux) avant le classement,
+    # pour raccourcir le prompt et ne pas payer le classement des doublons
+    candidate_entries = recent_entries
+    if config.dedup_enabled:
+        from auto_newsletter.dedup import EmbeddingCache, HashingEmbedder, OpenAIEmbedder, deduplicate_entries
+
+        embedder = OpenAIEmbedder(client) if config.embeddings_backend == "openai" else HashingEmbedder()
+        embedding_cache = EmbeddingCache(config.cache_path("embeddings.sqlite3"),
+                                         retention_days=config.embedding_retention_days)
+        with report.stage("dedup"):
+            candidate_entries = deduplicate_entries(recent_entries, embedder, embedding_cache,
+                                                    threshold=config.dedup_threshold)
+        embedding_cache.evict()
+        embedding_cache.close()
+
+    # Sélection des articles : par identifiants (JSON structuré, par défaut), par notes d'intérêt mises en cache
+    # ou, mode historique en une seule requête, par titres libres retrouvés ensuite par correspondance floue
+    if config.selection_mode == "ids":
+        selection_tasks = {
+            # Classement par tournoi : chaque requête reste dans le budget de jetons quel que soit le nombre d'articles
+            "top_entries": (lambda: tournament_select(
+                candidate_entries,
+                lambda batch, limit: select_entries_with_openai(batch, client, limit=limit, temperature=0.7),
+                limit=config.article_limit,
+                token_budget=config.ranking_token_budget,
+                max_workers=config.ranking_workers,
+            ), []),
+            "top_titles": (lambda top_entries: [entry.title for entry in top_entries], ["top_entries"]),
+            "top_articles": (lambda top_entries: [entry_to_article(entry) for entry in top_entries], ["top_entries"]),
+        }
+    elif config.selection_mode == "scores":
+        selection_tasks = {
+            # Notes absolues mises en cache : le coût ne dépend que des articles jamais notés
+            "top_entries": (lambda: select_by_scores(config, client, candidate_entries), []),
+            "top_titles": (lambda top_entries: [entry.title for entry in top_entries], ["top_entries"]),
+            "top_articles": (lambda top_entries: [entry_to_article(entry) for entry in top_entries], ["top_entries"]),
+        }
+    else:
+        titles = [entry.title for entry in candidate_entries]
+        selection_tasks = {
+            # Analyse des titres avec OpenAI pour la newsletter complète
+            "top_titles": (lambda: analyze_titles_with_openai("\n".join(titles), client,
+                                                              limit=config.article_limit, temperature=0.7), []),
+            # Sélection des articles et miniatures avec correspondance floue
+            "top_articles": (lambda top_titles: get_top_articles_with_thumbnails(candidate_entries, top_titles), ["top_titles"]),
+        }
+
+    # Les appels OpenAI indépendants sont lancés en parallèle dès la fin de la sélection : introduction,
+    # conclusion, titre et post LinkedIn. La durée totale est celle de la plus longue chaîne d'appels et non
+    # plus leur somme. Aucun texte n'est demandé si la sélection ne retient aucun article.
+    # Avec un aperçu en direct, les textes sont demandés en flux et chaque fragment met à jour leur section
+    def on_text(section):
+        return preview.section(section) if preview is not None else None
+
+    def if_selected(generate):
+        return lambda top_articles, *arguments: generate(*arguments) if top_articles else None
+
+    report.set_counter("candidate_entries", len(candidate_entries))
+    tasks = {
+        **selection_tasks,
+        # L'introduction et la conclusion reçoivent la date et les titres : chaque édition a son propre texte.
+        # Consignes et ligne éditoriale propres à la newsletter (par défaut, celles d'origine)
+        "introduction": (if_selected(lambda top_titles: generate_introduction(
+            client, top_titles, edition_date, on_text("introduction"),
+            instructions=config.introduction_instructions, persona=config.editorial_persona,
+        )), ["top_articles", "top_titles"]),
+        "conclusion": (if_selected(lambda top_titles: generate_conclusion(
+            client, top_titles, edition_date, on_text("conclusion"),
+            instructions=config.conclusion_instructions, persona=config.editorial_persona,
+        )), ["top_articles", "top_titles"]),
+        # Génération d'un titre pour la newsletter
+        "newsletter_title": (if_selected(lambda top_titles: generate_newsletter_title(
+            client, top_titles, edition_date, on_text("title"),
+            instructions=config.title_instructions, persona=config.editorial_persona,
+        )), ["top_articles", "top_titles"]),
+        "linkedin_post": (if_selected(lambda top_titles: generate_linkedin_post(
+            client, top_titles[:5], on_text("linkedin_post"),
+            instructions=config.linkedin_instructions, persona=config.editorial_persona,
+        )), ["top_articles", "top_titles"]),
+    }
+    # Les miniatures sont préparées pendant la rédaction des textes
+    tasks["thumbnails"] = (lambda top_articles: prepare_thumbnails(config, top_articles), ["top_articles"])
+    if preview is not None:
+        # La liste des articles s'affiche dès la fin de la sélection, sans attendre les textes
+        tasks["preview_articles"] = (
+            lambda top_articles: preview.update("articles", "", generate_article_list(top_articles)), ["top_articles"]
+        )
+    edition = run_dependency_graph(tasks)
+    top_articles = edition["top_articles"]
+
+    if len(top_articles) == 0:
+        print("Aucun article correspondant trouvé pour les titres sélectionnés.")
+        return []
+
+    if preview is not None:
+        # Versions définitives des textes (nettoyées, titre daté)
+        for section, name in (("title", "newsletter_title"), ("introduction", "introduction"),
+                              ("conclusion", "conclusion"), ("linkedin_post", "linkedin_post")):
+            preview.update(section, edition[name])
+
+    # Génération de la liste d'articles cliquables pour la newsletter, avec leurs miniatures locales
+    articles, thumbnail_files = edition["thumbnails"]
+    with report.stage("article_list"):
+        article_list_html = generate_article_list(articles)
+
+    # Génération de la page HTML avec les boutons et le post LinkedIn, et de la page HTML pour le blog
+    files = generate_html_pages(
+        config,
+        edition["newsletter_title"],
+        edition["introduction"],
+        article_list_html,
+        edition["conclusion"],
+        edition["linkedin_post"],
+        edition_date,
+    ) + thumbnail_files
+
+    # Mise à jour de l'archive du blog avec la nouvelle édition
+    return files + archive_edition(config, edition["newsletter_title"], edition["introduction"], articles,
+                                   edition_date)
+
+
+# Fonction pour générer l'édition du jour à partir des flux RSS, puis la publier (si publish est vrai).
+# Renvoie les fichiers écrits. clients peut être fourni pour réutiliser des connexions d'une édition à l'autre.
+def build_edition(config=None, clients=None, publish=True, preview=None):
+    from auto_newsletter.entry_store import EntryStore
+    from auto_newsletter.feeds import FeedCache, iter_feed_records
+    from auto_newsletter.seen import SeenIndex
+
+    config = config if config is not None else Config.from_env()
+    clients = clients if clients is not None else Clients(config)
+
+    # Pipeline en flux : téléchargement parallèle → analyse → normalisation en enregistrements compacts → filtre
+    # par date. Seuls les articles récents sont conservés en mémoire, quel que soit le nombre de flux.
+    # Les flux inchangés depuis la dernière exécution (réponse 304) sont servis depuis le cache disque
+    feed_cache = FeedCache(config.cache_path("feeds"))
+    feed_cache.prune(set(config.feed_urls))
+    feed_records = iter_feed_records(config.feed_urls, max_workers=config.feed_workers,
+                                     timeout=config.feed_timeout, cache=feed_cache)
+
+    # Archiver les articles au passage pour pouvoir reconstruire les éditions passées
+    entry_store = EntryStore(config.cache_path("entries.sqlite3"), retention_days=config.entry_retention_days)
+    try:
+        entry_store.evict()
+        feed_records = entry_store.archive(feed_records)
+
+        # Filtrer les articles publiés dans les dernières 24 heures ; le filtre consomme le flux d'articles,
+        # cette étape mesure donc la durée totale de téléchargement, d'analyse et de filtrage
+        with report.stage("feeds"):
+            recent_entries = filter_recent_articles(feed_records)
+    finally:
+        entry_store.close()
+    report.set_counter("recent_entries", len(recent_entries))
+
+    # Écarter les articles déjà traités par une exécution précédente (relance, plusieurs éditions par jour)
+    seen_index = SeenIndex(config.cache_path("seen.sqlite3"), retention_days=config.seen_retention_days)
+    try:
+        seen_index.evict()
+        return build_edition_from_entries(config, clients, recent_entries, seen_index, publish=publish,
+                                          preview=preview)
+    finally:
+        seen_index.close()
+
+
+# Fonction pour construire et publier l'édition des articles récents qui n'ont pas encore été traités,
+# puis les marquer comme traités dans seen_index. Renvoie les fichiers écrits.
+def build_edition_from_entries(config, clients, recent_entries, seen_index, publish=True, preview=None):
+    # En mode relecture, on régénère une édition existante : ses articles sont déjà marqués comme traités
+    if not config.llm_replay_only:
+        recent_entries = seen_index.filter_unseen(recent_entries)
+    report.set_counter("new_entries", len(recent_entries))
+
+    # Vérifier si des articles récents ont été récupérés
+    if len(recent_entries) == 0:
+        print("Aucun nouvel article trouvé dans les dernières 24 heures.")
+        return []
+
+    files = compose_edition(config, clients, recent_entries, preview=preview)
+    if files:
+        # Marquer les articles comme traités une fois l'édition écrite : un échec avant ce point sera rejoué
+        seen_index.mark_seen(recent_entries)
+
+        # Publier les fichiers produits par cette exécution
+        if publish:
+            publish_files(config, files, f"Auto-generated newsletter for {datetime.now().strftime('%d/%m/%Y')}")
+    return files
+
+
+# Fonction pour écrire le rapport d'exécution à côté des pages générées : une ligne par exécution dans
+# l'historique reports.jsonl (plusieurs éditions par jour ne s'écrasent pas) et le fichier texte Prometheus
+def write_run_report(config, clients=None):
+    if clients is not None:
+        for name, value in clients.cache_stats().items():
+            report.set_counter(name, value)
+    if not os.path.exists(config.newsletter_dir):
+        os.makedirs(config.newsletter_dir)
+    report.append_jsonl(os.path.join(config.newsletter_dir, "reports.jsonl"))
+    report.write_prometheus(os.path.join(config.newsletter_dir, "newsletter.prom"))
+
+
+# État de chaque processus de rattrapage, créé par init_backfill_worker
+_worker_config = None
+_worker_clients = None
+
+
+# Initialisation de chaque processus de rattrapage : configuration du processus parent et client OpenAI
+# borné par le sémaphore et les seaux de débit communs
+def init_backfill_worker(api_semaphore, api_buckets, config):
+    global _worker_config, _worker_clients
+    _worker_config = config
+    _worker_clients = Clients(config, api_semaphore, api_buckets=api_buckets)
+
+
+# Fonction pour reconstruire l'édition d'un jour passé à partir des articles archivés
+# et des réponses OpenAI en cache : l'édition couvre les articles publiés ce jour-là
+def build_backfill_edition(day):
+    from auto_newsletter.entry_store import EntryStore
+
+    config = _worker_config if _worker_config is not None else Config.from_env()
+    clients = _worker_clients if _worker_clients is not None else Clients(config)
+    start = datetime(day.year, day.month, day.day)
+    end = start + timedelta(days=1)
+    entry_store = EntryStore(config.cache_path("entries.sqlite3"), retention_days=config.entry_retention_days)
+    recent_entries = entry_store.entries_between(start.timestamp(), end.timestamp())
+    entry_store.close()
+    if len(recent_entries) == 0:
+        print(f"Aucun article archivé pour le {start.strftime('%d/%m/%Y')}.")
+        return []
+    return compose_edition(config, clients, recent_entries, edition_date=start)
@@ -0,0 +1,142 @@
+import http.server
+import json
+import threading
+
+from auto_newsletter.render import render_preview_page, render_text, stylesheet
+
+DEFAULT_PORT = 8000
+# Intervalle des commentaires envoyés pour garder la connexion ouverte quand rien ne change
+KEEPALIVE_SECONDS = 15
+# Durée maximale pendant laquelle le serveur reste ouvert après la génération, le temps qu'un onglet la reçoive
+LINGER_SECONDS = 300
+
+
+# État de l'aperçu d'une édition en cours de génération : dernière version de chaque section.
+# Les threads de génération appellent update() à chaque fragment, les connexions du serveur attendent les changements.
+class EditionPreview:
+    def __init__(self):
+        self._sections = {}
+        self._version = 0
+        self._done = False
+        self._condition = threading.Condition()
+
+    # Mettre à jour une section avec son texte (échappé pour l'affichage) ou directement son HTML
+    def update(self, section, text, html_content=None):
+        payload = {
+            "section": section,
+            "text": text.replace("**", ""),
+            "html": html_content if html_content is not None else render_text(text.replace("**", "")),
+        }
+        with self._condition:
+            self._version += 1
+            self._sections[section] = (self._version, payload)
+            self._condition.notify_all()
+
+    # Fonction de rappel pour complete_text : chaque fragment reçu met à jour la section
+    def section(self, section):
+        return lambda text: self.update(section, text)
+
+    def finish(self):
+        with self._condition:
+            self._done = True
+            self._condition.notify_all()
+
+    # Attendre des sections plus récentes que since ; renvoie (version, sections modifiées, génération terminée).
+    # Les fragments arrivés pendant l'envoi précédent sont regroupés : seule la dernière version est transmise.
+    def wait_changes(self, since, timeout=None):
+        with self._condition:
+            self._condition.wait_for(lambda: self._version > since or self._done, timeout)
+            changed = [payload for version, payload in self._sections.values() if version > since]
+            return self._version, changed, self._done
+
+
+# Serveur HTTP local de l'aperçu : la page est servie immédiatement, sections vides, puis remplie par des
+# événements envoyés par le serveur (/events) au fil de la génération
+class PreviewServer:
+    def __init__(self, preview, host="127.0.0.1", port=DEFAULT_PORT):
+        # Connexions /events ouvertes, et fin de génération transmise à au moins un onglet
+        self._streams = 0
+        self._delivered = False
+        self._streams_changed = threading.Condition()
+        server = self
+        stylesheet_path, stylesheet_content = stylesheet()
+        page = render_preview_page().encode("utf-8")
+        routes = {
+            "/": ("text/html; charset=utf-8", page),
+            f"/{stylesheet_path}": ("text/css", stylesheet_content),
+        }
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if self.path == "/events":
+                    self._send_events()
+                    return
+                if self.path not in routes:
+                    self.send_error(404)
+                    return
+                content_type, body = routes[self.path]
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _send_events(self):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.end_headers()
+                version = 0
+                with server._streams_changed:
+                    server._streams += 1
+                try:
+                    while True:
+                        version, changed, done = preview.wait_changes(version, KEEPALIVE_SECONDS)
+                        if not changed and not done:
+                            self.wfile.write(b": keep-alive\n\n")
+                        for payload in changed:
+                            data = json.dumps(payload, ensure_ascii=False)
+                            self.wfile.write(f"event: section\ndata: {data}\n\n".encode("utf-8"))
+                        if done:
+                            self.wfile.write(b"event: done\ndata: {}\n\n")
+                        self.wfile.flush()
+                        if done:
+                            with server._streams_changed:
+                                server._delivered = True
+                            return
+                except (BrokenPipeError, ConnectionResetError):
+                    # Onglet fermé : rien à faire, la génération continue
+                    return
+                finally:
+                    with server._streams_changed:
+                        server._streams -= 1
+                        server._streams_changed.notify_all()
+
+        self.preview = preview
+        self._server = http.server.ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    # Attendre, après la génération, que l'édition terminée ait été transmise et qu'aucun onglet ne reste
+    # connecté, au plus timeout secondes ; renvoie True si l'aperçu a été livré
+    def linger(self, timeout=LINGER_SECONDS):
+        self.preview.finish()
+        with self._streams_changed:
+            return self._streams_changed.wait_for(lambda: self._delivered and self._streams == 0, timeout)
+
+    def close(self):
+        self.preview.finish()
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,84 @@
+import abc
+import os
+import shutil
+import subprocess
+import urllib.parse
+
+
+# Erreur de publication ; le message ne contient jamais l'URL distante (qui peut porter un jeton)
+class PublishError(RuntimeError):
+    pass
+
+
+# Publication des fichiers produits : les fichiers sont mis de côté avec stage(), puis publiés en une seule fois
+# par publish(), ce qui permet de regrouper plusieurs éditions (rattrapage) dans une seule publication
+class Publisher(abc.ABC):
+    def __init__(self):
+        self.pending = []
+
+    def stage(self, paths):
+        for path in paths:
+            if path not in self.pending:
+                self.pending.append(path)
+
+    def publish(self, message):
+        if not self.pending:
+            return False
+        paths, self.pending = self.pending, []
+        return self._publish(paths, message)
+
+    # Publier les fichiers donnés avec le message de commit ; renvoie vrai si quelque chose a été publié
+    @abc.abstractmethod
+    def _publish(self, paths, message):
+        pass
+
+
+# Publication dans un dépôt Git : ajout des seuls fichiers de l'exécution, un commit, un push
+class GitPublisher(Publisher):
+    def __init__(self, repo_dir, remote_url, branch="main"):
+        super().__init__()
+        self.repo_dir = repo_dir
+        self.remote_url = remote_url
+        self.branch = branch
+
+    # Masquer l'URL distante et ses identifiants dans un message de git (push et erreurs d'authentification
+    # peuvent la reproduire)
+    def _redact(self, text):
+        parts = urllib.parse.urlsplit(self.remote_url or "")
+        for secret in (self.remote_url, parts.password, parts.username):
+            if secret:
+                text = text.replace(secret, "***")
+        return text
+
+    def _git(self, *args, check=True):
+        result = subprocess.run(["git", *args], cwd=self.repo_dir, capture_output=True, text=True)
+        if check and result.returncode != 0:
+            raise PublishError(f"git {args[0]} a échoué ({result.returncode}) : {self._redact(result.stderr.strip())}")
+        return result
+
+    def _publish(self, paths, message):
+        relative_paths = [os.path.relpath(path, self.repo_dir) for path in paths]
+        self._git("add", "--", *relative_paths)
+        # Rien à publier si les fichiers sont identiques à ceux du dernier commit
+        if self._git("diff", "--cached", "--quiet", "--", *relative_paths, check=False).returncode == 0:
+            return False
+        self._git("commit", "-m", message, "--", *relative_paths)
+        self._git("push", self.remote_url, f"HEAD:{self.branch}")
+        return True
+
+
+# Publication par simple copie dans un dossier local (tests hors ligne, partage réseau, serveur web)
+class DirectoryPublisher(Publisher):
+    def __init__(self, source_dir, target_dir):
+        super().__init__()
+        if not target_dir:
+            raise PublishError("Aucun dossier de destination pour la publication (PUBLISH_TARGET_DIR)")
+        self.source_dir = source_dir
+        self.target_dir = target_dir
+
+    def _publish(self, paths, message):
+        for path in paths:
+            target = os.path.join(self.target_dir, os.path.relpath(path, self.source_dir))
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copy2(path, target)
+        return True
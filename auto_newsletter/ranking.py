@@ -0,0 +1,71 @@
+import concurrent.futures
+import functools
+
+DEFAULT_MODEL = "gpt-4o-mini-2024-07-18"
+DEFAULT_TOKEN_BUDGET = 6000
+DEFAULT_MAX_WORKERS = 8
+
+
+@functools.lru_cache(maxsize=None)
+def _encoding(model):
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        # tiktoken télécharge ses tables au premier usage : hors ligne, on se contente de l'estimation
+        return None
+
+
+# Fonction pour compter les jetons d'un texte (tiktoken si disponible, sinon estimation à 4 caractères par jeton)
+def count_tokens(text, model=DEFAULT_MODEL):
+    encoding = _encoding(model)
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text))
+
+
+# Fonction pour découper les articles en lots dont la liste de titres numérotés tient dans le budget de jetons
+def split_into_batches(entries, token_budget=DEFAULT_TOKEN_BUDGET, model=DEFAULT_MODEL):
+    batches = []
+    batch = []
+    batch_tokens = 0
+    for entry in entries:
+        # Le titre est envoyé sous la forme "<identifiant>. <titre>" ; l'identifiant compte pour quelques jetons
+        entry_tokens = count_tokens(entry.title, model) + 4
+        if batch and batch_tokens + entry_tokens > token_budget:
+            batches.append(batch)
+            batch = []
+            batch_tokens = 0
+        batch.append(entry)
+        batch_tokens += entry_tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+# Fonction pour classer un grand nombre d'articles par tournoi : chaque lot est classé en parallèle,
+# puis les gagnants de chaque lot s'affrontent au tour suivant jusqu'à tenir dans un seul lot.
+# select(lot, limite) renvoie les articles retenus du lot, par ordre de préférence.
+def tournament_select(entries, select, limit, token_budget=DEFAULT_TOKEN_BUDGET, model=DEFAULT_MODEL,
+                      max_workers=DEFAULT_MAX_WORKERS):
+    entries = list(entries)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while True:
+            batches = split_into_batches(entries, token_budget, model)
+            if len(batches) <= 1:
+                return select(entries, limit)[:limit]
+
+            winners = []
+            for selected in executor.map(lambda batch: select(batch, limit), batches):
+                winners.extend(selected[:limit])
+            if len(winners) >= len(entries):
+                raise ValueError(
+                    f"Le budget de {token_budget} jetons est trop petit pour départager {len(entries)} articles"
+                )
+            entries = winners
@@ -0,0 +1,141 @@
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+import openai
+
+from auto_newsletter.ranking import count_tokens
+
+DEFAULT_REQUESTS_PER_MINUTE = 500
+DEFAULT_TOKENS_PER_MINUTE = 200000
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_TIMEOUT = 60.0
+DEFAULT_MAX_RETRIES = 5
+# Jetons de sortie réservés quand l'appel ne précise pas max_tokens
+DEFAULT_COMPLETION_TOKENS = 1000
+
+# Erreurs transitoires pour lesquelles un nouvel essai a des chances de réussir
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+
+# Seau à jetons : une capacité qui se remplit en continu au débit donné, partagé entre threads.
+# shared_state (voir shared_bucket_state) partage le seau entre plusieurs processus : la quantité disponible
+# et l'heure de sa dernière mise à jour vivent alors en mémoire partagée, sous le verrou de ce tableau.
+class TokenBucket:
+    def __init__(self, rate_per_minute, capacity=None, shared_state=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        if shared_state is not None:
+            self._state = shared_state
+            self._lock = shared_state.get_lock()
+        else:
+            self._state = [float(self.capacity), time.time()]
+            self._lock = threading.Lock()
+
+    # Attendre que la quantité demandée soit disponible, puis la consommer
+    def acquire(self, amount=1):
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                # Horloge murale : contrairement à time.monotonic, elle a la même origine dans tous les processus
+                now = time.time()
+                available = min(self.capacity, self._state[0] + max(0.0, now - self._state[1]) * self.rate)
+                self._state[1] = now
+                if available >= amount:
+                    self._state[0] = available - amount
+                    return
+                self._state[0] = available
+                wait = (amount - available) / self.rate
+            time.sleep(wait)
+
+
+# Fonction pour créer l'état d'un seau à jetons partagé entre les processus d'un même contexte multiprocessing
+# (transmis aux processus à leur création, comme le sémaphore des appels simultanés)
+def shared_bucket_state(context, rate_per_minute, capacity=None):
+    return context.Array("d", [float(capacity or rate_per_minute), time.time()])
+
+
+# Fonction pour calculer le délai avant un nouvel essai : Retry-After du serveur s'il est fourni,
+# sinon attente exponentielle avec gigue complète
+def retry_delay(error, attempt, base_delay=1.0, max_delay=60.0):
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    if retry_after:
+        try:
+            return min(max_delay, float(retry_after))
+        except ValueError:
+            pass
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+# Client enveloppant le client OpenAI : débit limité en requêtes et en jetons par minute, nombre d'appels
+# simultanés borné par un sémaphore, délai maximal par appel et nouveaux essais avec attente exponentielle
+# sur les erreurs 429 et transitoires. Pour plusieurs processus (rattrapage), semaphore et shared_buckets
+# (états partagés des seaux de requêtes et de jetons) appliquent les mêmes limites à leur ensemble.
+# Les vecteurs (embeddings.create) passent par les mêmes limites que chat.completions.create.
+# Avec stream=True, le sémaphore n'encadre que l'ouverture du flux : il est libéré dès que la réponse commence,
+# pas quand elle a été entièrement lue.
+class RateLimitedClient:
+    def __init__(self, client, requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE,
+                 tokens_per_minute=DEFAULT_TOKENS_PER_MINUTE, max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                 semaphore=None, timeout=DEFAULT_TIMEOUT, max_retries=DEFAULT_MAX_RETRIES,
+                 base_delay=1.0, max_delay=60.0, shared_buckets=None):
+        self.client = client
+        requests_state, tokens_state = shared_buckets if shared_buckets is not None else (None, None)
+        self.requests = TokenBucket(requests_per_minute, shared_state=requests_state)
+        self.tokens = TokenBucket(tokens_per_minute, shared_state=tokens_state)
+        self.semaphore = semaphore if semaphore is not None else threading.BoundedSemaphore(max_concurrency)
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retries = 0
+        self._retries_lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create_chat_completion))
+        self.embeddings = SimpleNamespace(create=self._create_embeddings)
+
+    # Estimation des jetons consommés par un appel : messages envoyés et réponse maximale attendue
+    def _estimate_tokens(self, parameters):
+        model = parameters.get("model")
+        prompt_tokens = sum(count_tokens(message.get("content") or "", model) + 4
+                            for message in parameters.get("messages", []))
+        return prompt_tokens + (parameters.get("max_tokens") or DEFAULT_COMPLETION_TOKENS)
+
+    def _create_chat_completion(self, **parameters):
+        return self._call(self.client.chat.completions.create, parameters, self._estimate_tokens(parameters))
+
+    # Vecteurs : seuls les textes envoyés consomment des jetons
+    def _create_embeddings(self, **parameters):
+        texts = parameters.get("input", [])
+        texts = [texts] if isinstance(texts, str) else texts
+        estimated_tokens = sum(count_tokens(text, parameters.get("model")) for text in texts)
+        return self._call(self.client.embeddings.create, parameters, estimated_tokens)
+
+    def _call(self, create, parameters, estimated_tokens):
+        parameters.setdefault("timeout", self.timeout)
+        for attempt in range(self.max_retries + 1):
+            try:
+                with self.semaphore:
+                    self.requests.acquire()
+                    self.tokens.acquire(estimated_tokens)
+                    return create(**parameters)
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = retry_delay(e, attempt, self.base_delay, self.max_delay)
+                with self._retries_lock:
+                    self.retries += 1
+                print(f"Appel OpenAI refusé ou interrompu ({type(e).__name__}), nouvel essai dans {delay:.1f} s")
+                # L'attente se fait hors du sémaphore pour laisser passer les autres appels
+                time.sleep(delay)
+
+    def __getattr__(self, name):
+        if name == "client":
+            raise AttributeError(name)
+        return getattr(self.client, name)
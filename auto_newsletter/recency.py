@@ -0,0 +1,36 @@
+import array
+import bisect
+import math
+import operator
+import time
+
+RECENT_WINDOW_SECONDS = 24 * 3600
+
+
+# Index des articles par date pour les grands ensembles gardés en mémoire (processus de longue durée,
+# plusieurs newsletters) : les dates sont converties une seule fois en entiers dans un tableau compact trié,
+# chaque requête d'intervalle est ensuite une recherche dichotomique au lieu d'un parcours complet.
+class RecencyIndex:
+    def __init__(self, entries):
+        dated = [entry for entry in entries if entry.published is not None]
+        # Du plus récent au plus ancien, puis par clé : l'ordre attendu par les prompts (et le cache).
+        # Deux tris stables sur un attribut simple évitent de construire un tuple par article
+        dated.sort(key=operator.attrgetter("key"))
+        dated.sort(key=operator.attrgetter("published"), reverse=True)
+        # Les dates sont stockées avec le signe opposé pour que le tableau soit croissant
+        self._entries = dated
+        self._negated = array.array("q", (-entry.published for entry in dated))
+
+    def __len__(self):
+        return len(self._entries)
+
+    # Articles publiés dans l'intervalle [start, end] (epoch UTC), du plus récent au plus ancien
+    def between(self, start, end):
+        first = bisect.bisect_left(self._negated, -math.floor(end))
+        last = bisect.bisect_right(self._negated, -math.ceil(start))
+        return self._entries[first:last]
+
+    # Articles publiés dans les dernières 24 heures
+    def recent(self, now=None):
+        now = now if now is not None else time.time()
+        return self.between(now - RECENT_WINDOW_SECONDS, now)
@@ -0,0 +1,80 @@
+import calendar
+import hashlib
+import time
+
+
+# Fonction pour calculer une clé stable pour un article du flux (identifiant, sinon lien, sinon titre)
+def entry_key(entry):
+    raw = entry.get("id") or entry.get("link") or entry.get("title", "")
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+# Fonction pour extraire l'URL de la miniature d'un article (media:thumbnail, sinon media:content)
+def thumbnail_url(entry):
+    media = entry.get("media_thumbnail") or entry.get("media_content")
+    return (media[0].get("url") or "") if media else ""
+
+
+# Article normalisé et compact : seuls les champs utiles au pipeline sont conservés. Des listes de médias
+# de feedparser, seule l'URL de la miniature est gardée (chaîne vide sans miniature).
+class EntryRecord:
+    __slots__ = ("key", "title", "link", "published", "feed_url", "thumbnail")
+
+    def __init__(self, key, title, link, published, feed_url=None, thumbnail=""):
+        self.key = key
+        self.title = title
+        self.link = link
+        # Date de publication en secondes depuis l'epoch (UTC) : date de publication, sinon de mise à jour,
+        # sinon date de première apparition (assign_first_seen) ; None tant qu'aucune n'est connue
+        self.published = published
+        self.feed_url = feed_url
+        self.thumbnail = thumbnail
+
+    @classmethod
+    def from_entry(cls, entry, feed_url=None):
+        # struct_time en UTC (feedparser) converti une seule fois en entier
+        parsed = entry.get("published_parsed") or entry.get("updated_parsed")
+        return cls(
+            key=entry_key(entry),
+            title=entry.get("title", "").strip(),
+            link=entry.get("link", ""),
+            published=calendar.timegm(parsed) if parsed else None,
+            feed_url=feed_url,
+            thumbnail=thumbnail_url(entry),
+        )
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __setstate__(self, state):
+        # Enregistrements des versions précédentes (cache des flux, entries.sqlite3) : listes de médias brutes
+        if "_media" in state:
+            state = dict(state)
+            media = state.pop("_media")
+            state["thumbnail"] = (media[0].get("url") or "") if media else ""
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    def __repr__(self):
+        return f"EntryRecord(title={self.title!r}, link={self.link!r}, published={self.published!r})"
+
+
+# Générateur normalisant les articles d'un flux analysé en enregistrements compacts
+def iter_records(entries, feed_url=None):
+    for entry in entries:
+        if entry.get("title"):
+            yield EntryRecord.from_entry(entry, feed_url)
+
+
+# Fonction pour dater les articles que le flux ne date pas : ils reçoivent la date de leur première apparition,
+# reprise des enregistrements du téléchargement précédent (cache des flux) ou, à défaut, l'heure actuelle.
+# Renvoie le nombre d'articles ainsi datés.
+def assign_first_seen(records, previous_records=(), now=None):
+    undated = [record for record in records if record.published is None]
+    if not undated:
+        return 0
+    now = int(now if now is not None else time.time())
+    first_seen = {record.key: record.published for record in previous_records if record.published is not None}
+    for record in undated:
+        record.published = first_seen.get(record.key, now)
+    return len(undated)
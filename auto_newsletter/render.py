@@ -0,0 +1,98 @@
+import functools
+import hashlib
+import html
+import os
+import string
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+ASSETS_DIRNAME = "assets"
+THUMBNAILS_DIRNAME = "thumbnails"
+
+
+# Fonction pour charger et compiler un gabarit une seule fois par processus
+@functools.lru_cache(maxsize=None)
+def load_template(name):
+    with open(os.path.join(TEMPLATES_DIR, name), encoding="utf-8") as file:
+        return string.Template(file.read().rstrip("\n"))
+
+
+# Feuille de style partagée par les deux pages, nommée d'après son empreinte pour un cache navigateur durable
+@functools.lru_cache(maxsize=None)
+def stylesheet():
+    with open(os.path.join(TEMPLATES_DIR, "newsletter.css"), "rb") as file:
+        content = file.read()
+    digest = hashlib.sha256(content).hexdigest()[:12]
+    return f"{ASSETS_DIRNAME}/newsletter.{digest}.css", content
+
+
+# Fonction pour écrire la feuille de style dans un dossier de sortie si elle n'y est pas déjà
+def write_stylesheet(directory):
+    relative_path, content = stylesheet()
+    path = os.path.join(directory, relative_path)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as file:
+            file.write(content)
+    return relative_path
+
+
+# Fonction pour échapper un texte généré et conserver ses retours à la ligne
+def render_text(text):
+    return html.escape(text).replace("\n", "<br>")
+
+
+# Balise de la miniature locale d'un article ("image" : nom du fichier en cache), dimensions fixées pour
+# réserver sa place avant le chargement
+def render_thumbnail(name):
+    if not name:
+        return ""
+    return (f"<img src='{ASSETS_DIRNAME}/{THUMBNAILS_DIRNAME}/{html.escape(name)}' width='320' height='180' alt=''"
+            " loading='lazy' decoding='async'>")
+
+
+# Fonction pour générer la liste des articles (une seule concaténation)
+def render_article_list(articles):
+    row = load_template("article.html")
+    return "\n".join(
+        row.substitute(link=html.escape(article["link"]), title=html.escape(article["title"]),
+                       image=render_thumbnail(article.get("image")))
+        for article in articles
+    )
+
+
+# Fonction pour produire la page newsletter (boutons et post LinkedIn) et la page blog en un seul rendu :
+# les fragments communs sont échappés et assemblés une fois, puis insérés dans les deux gabarits
+def render_edition(newsletter_title, introduction, article_list_html, conclusion, linkedin_post):
+    stylesheet_href, _ = stylesheet()
+    title = html.escape(newsletter_title)
+    content = load_template("content.html").substitute(
+        introduction=render_text(introduction),
+        articles=article_list_html,
+        conclusion=render_text(conclusion),
+    )
+    newsletter_html = load_template("newsletter.html").substitute(
+        title=title,
+        stylesheet=stylesheet_href,
+        content=content,
+        linkedin_post=html.escape(linkedin_post),
+    )
+    blog_html = load_template("blog.html").substitute(title=title, stylesheet=stylesheet_href, content=content)
+    return newsletter_html, blog_html
+
+
+# Fonction pour produire la page d'aperçu en direct : la page newsletter aux sections vides, chacune repérée
+# par un identifiant, et le script qui les remplit au fil des événements du serveur d'aperçu
+def render_preview_page(title="Génération en cours…"):
+    stylesheet_href, _ = stylesheet()
+    content = load_template("content.html").substitute(
+        introduction='<span id="preview-introduction"></span>',
+        articles='<div id="preview-articles"></div>',
+        conclusion='<span id="preview-conclusion"></span>',
+    )
+    page = load_template("newsletter.html").substitute(
+        title=html.escape(title),
+        stylesheet=f"/{stylesheet_href}",
+        content=content,
+        linkedin_post="",
+    )
+    return page.replace("</body>", load_template("preview.html").template + "\n</body>", 1)
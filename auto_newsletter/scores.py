@@ -0,0 +1,83 @@
+import concurrent.futures
+import time
+
+from auto_newsletter.ranking import DEFAULT_MAX_WORKERS, DEFAULT_MODEL, DEFAULT_TOKEN_BUDGET, split_into_batches
+from auto_newsletter.storage import BATCH_SIZE, open_db
+
+DEFAULT_RETENTION_DAYS = 7
+
+
+# Notes d'intérêt des articles, indexées par consigne de notation et par article : une note ne dépend que du
+# titre et de la consigne, elle est donc calculée une seule fois puis partagée entre éditions et newsletters
+class ScoreStore:
+    def __init__(self, path, retention_days=DEFAULT_RETENTION_DAYS):
+        self.retention_seconds = int(retention_days * 86400)
+        self._db = open_db(path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS scores ("
+            "prompt_key TEXT NOT NULL, entry_key TEXT NOT NULL, score REAL NOT NULL, scored INTEGER NOT NULL,"
+            " PRIMARY KEY (prompt_key, entry_key)) WITHOUT ROWID"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS scores_scored ON scores (scored)")
+        self._db.commit()
+
+    # Notes déjà connues pour ces articles, {clé d'article: note}
+    def get(self, prompt_key, entry_keys):
+        scores = {}
+        for start in range(0, len(entry_keys), BATCH_SIZE):
+            batch = entry_keys[start:start + BATCH_SIZE]
+            placeholders = ",".join("?" * len(batch))
+            rows = self._db.execute(
+                f"SELECT entry_key, score FROM scores WHERE prompt_key = ? AND entry_key IN ({placeholders})",
+                [prompt_key, *batch],
+            )
+            scores.update(rows)
+        return scores
+
+    def set(self, prompt_key, scores, now=None):
+        now = int(now if now is not None else time.time())
+        self._db.executemany(
+            "INSERT OR REPLACE INTO scores (prompt_key, entry_key, score, scored) VALUES (?, ?, ?, ?)",
+            ((prompt_key, entry_key, score, now) for entry_key, score in scores.items()),
+        )
+        self._db.commit()
+
+    # Supprimer les notes plus anciennes que la durée de rétention
+    def evict(self, now=None):
+        now = int(now if now is not None else time.time())
+        cursor = self._db.execute("DELETE FROM scores WHERE scored < ?", (now - self.retention_seconds,))
+        self._db.commit()
+        return cursor.rowcount
+
+    def close(self):
+        self._db.close()
+
+
+# Fonction pour noter les articles : seuls les articles jamais notés avec cette consigne sont envoyés au modèle,
+# par lots tenant dans le budget de jetons, notés en parallèle. score_batch(lot) renvoie {indice dans le lot: note}.
+# Renvoie {clé d'article: note} ; un article que le modèle n'a pas noté n'a pas de note (et sera renvoyé la fois suivante).
+def score_entries(entries, score_batch, store, prompt_key, token_budget=DEFAULT_TOKEN_BUDGET, model=DEFAULT_MODEL,
+                  max_workers=DEFAULT_MAX_WORKERS):
+    keys = list(dict.fromkeys(entry.key for entry in entries))
+    scores = store.get(prompt_key, keys)
+    unscored = list({entry.key: entry for entry in entries if entry.key not in scores}.values())
+    if not unscored:
+        return scores
+
+    batches = split_into_batches(unscored, token_budget, model)
+    new_scores = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for batch, batch_scores in zip(batches, executor.map(score_batch, batches)):
+            for index, score in batch_scores.items():
+                new_scores[batch[index].key] = score
+    # Écriture depuis le thread appelant : la connexion SQLite n'est pas partagée avec les threads de notation
+    store.set(prompt_key, new_scores)
+    scores.update(new_scores)
+    return scores
+
+
+# Fonction pour retenir les limit articles les mieux notés ; à note égale, l'ordre d'entrée (le plus récent) prime
+def top_scored(entries, scores, limit):
+    scored_entries = [entry for entry in entries if entry.key in scores]
+    scored_entries.sort(key=lambda entry: -scores[entry.key])
+    return scored_entries[:limit]
@@ -0,0 +1,51 @@
+import time
+
+from auto_newsletter.storage import BATCH_SIZE, open_db
+
+DEFAULT_RETENTION_DAYS = 30
+
+
+# Index disque des articles déjà traités, pour que chaque exécution ne traite que les nouveaux
+class SeenIndex:
+    def __init__(self, path, retention_days=DEFAULT_RETENTION_DAYS):
+        self.retention_seconds = int(retention_days * 86400)
+        self._db = open_db(path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS seen (key TEXT PRIMARY KEY, first_seen INTEGER NOT NULL) WITHOUT ROWID"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS seen_first_seen ON seen (first_seen)")
+        self._db.commit()
+
+    def _known_keys(self, keys):
+        known = set()
+        for start in range(0, len(keys), BATCH_SIZE):
+            batch = keys[start:start + BATCH_SIZE]
+            placeholders = ",".join("?" * len(batch))
+            rows = self._db.execute(f"SELECT key FROM seen WHERE key IN ({placeholders})", batch)
+            known.update(row[0] for row in rows)
+        return known
+
+    # Conserver uniquement les articles jamais traités par une exécution précédente
+    def filter_unseen(self, entries):
+        keys = [entry.key for entry in entries]
+        known = self._known_keys(keys)
+        return [entry for entry, key in zip(entries, keys) if key not in known]
+
+    # Enregistrer les articles traités ; la date de première vue d'un article déjà connu est conservée
+    def mark_seen(self, entries, now=None):
+        now = int(now if now is not None else time.time())
+        self._db.executemany(
+            "INSERT OR IGNORE INTO seen (key, first_seen) VALUES (?, ?)",
+            ((entry.key, now) for entry in entries),
+        )
+        self._db.commit()
+
+    # Supprimer les entrées plus anciennes que la durée de rétention
+    def evict(self, now=None):
+        now = int(now if now is not None else time.time())
+        cursor = self._db.execute("DELETE FROM seen WHERE first_seen < ?", (now - self.retention_seconds,))
+        self._db.commit()
+        return cursor.rowcount
+
+    def close(self):
+        self._db.close()
@@ -0,0 +1,37 @@
+import concurrent.futures
+
+
+# Fonction pour exécuter un graphe de tâches dépendantes en parallèle
+# tasks : {nom: (fonction, [noms des dépendances])} ; la fonction reçoit les résultats de ses dépendances
+# en arguments positionnels, et chaque tâche démarre dès que toutes ses dépendances sont terminées.
+def run_dependency_graph(tasks, max_workers=None):
+    for name, (_, dependencies) in tasks.items():
+        for dependency in dependencies:
+            if dependency not in tasks:
+                raise ValueError(f"La tâche {name} dépend d'une tâche inconnue : {dependency}")
+
+    results = {}
+    pending = dict(tasks)
+    running = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers or len(tasks) or 1) as executor:
+        while pending or running:
+            for name, (function, dependencies) in list(pending.items()):
+                if all(dependency in results for dependency in dependencies):
+                    arguments = [results[dependency] for dependency in dependencies]
+                    running[executor.submit(function, *arguments)] = name
+                    del pending[name]
+
+            if not running:
+                raise ValueError(f"Dépendances circulaires entre les tâches : {', '.join(pending)}")
+
+            done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name] = future.result()
+                except Exception:
+                    # Ne pas lancer les tâches restantes si une étape a échoué
+                    for other in running:
+                        other.cancel()
+                    raise
+    return results
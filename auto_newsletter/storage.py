@@ -0,0 +1,18 @@
+import os
+import sqlite3
+
+# Nombre maximal de valeurs par requête SQLite (listes IN (...) et lots d'insertion)
+BATCH_SIZE = 500
+# Attente maximale (s) d'un verrou tenu par un autre processus avant l'erreur "database is locked"
+BUSY_TIMEOUT = 30
+
+
+# Fonction pour ouvrir une base SQLite partagée entre processus (démon, exécution ponctuelle, rattrapage) :
+# dossier créé au besoin, attente des verrous concurrents et journal WAL (lectures non bloquées par une écriture)
+def open_db(path, **options):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    db = sqlite3.connect(path, timeout=BUSY_TIMEOUT, **options)
+    db.execute("PRAGMA journal_mode=WAL")
+    return db
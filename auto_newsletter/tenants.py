@@ -0,0 +1,118 @@
+import dataclasses
+import json
+import os
+
+from auto_newsletter.clients import Clients
+from auto_newsletter.instrumentation import report
+
+
+# Fonction pour lire le fichier des newsletters : une liste d'objets JSON avec un nom ("name") et les réglages
+# de Config à redéfinir (feed_urls, article_limit, selection_audience, editorial_persona, *_instructions,
+# newsletter_dir, blog_dir, publish_*...).
+# Les autres réglages, dont le dossier de cache, sont ceux de base_config : les newsletters partagent ainsi
+# le cache des flux, des réponses OpenAI et des notes. Renvoie {nom: Config}, dans l'ordre du fichier.
+def load_tenants(path, base_config):
+    with open(path, encoding="utf-8") as file:
+        definitions = json.load(file)
+    if not isinstance(definitions, list):
+        raise ValueError(f"{path} doit contenir une liste de newsletters")
+
+    fields = {field.name for field in dataclasses.fields(base_config)}
+    tenants = {}
+    for definition in definitions:
+        definition = dict(definition)
+        name = definition.pop("name", None)
+        if not name:
+            raise ValueError(f"Newsletter sans nom dans {path}")
+        if name in tenants:
+            raise ValueError(f"Newsletter {name} déclarée deux fois dans {path}")
+        unknown = sorted(set(definition) - fields)
+        if unknown:
+            raise ValueError(f"Réglages inconnus pour la newsletter {name} : {', '.join(unknown)}")
+        tenants[name] = dataclasses.replace(base_config, **{
+            # Par défaut, chaque newsletter écrit dans son propre sous-dossier et sélectionne ses articles
+            # par notes, seul mode dont le résultat se partage d'une newsletter à l'autre
+            "newsletter_dir": os.path.join(base_config.newsletter_dir, name),
+            "blog_dir": os.path.join(base_config.blog_dir, name),
+            "selection_mode": "scores",
+            **definition,
+        })
+    return tenants
+
+
+# Fonction pour lister les flux de toutes les newsletters, chacun une seule fois, dans l'ordre de déclaration
+def unique_feed_urls(tenants):
+    return list(dict.fromkeys(url for config in tenants.values() for url in config.feed_urls))
+
+
+# Chaque newsletter a son propre index des articles déjà traités : un article publié par l'une reste
+# nouveau pour les autres
+def seen_index_path(config, name):
+    return config.cache_path(f"seen-{name}.sqlite3")
+
+
+# Fonction pour extraire les articles récents d'une newsletter (ceux de ses flux), un seul par article
+# même s'il apparaît dans plusieurs flux
+def entries_for_tenant(config, recent_entries):
+    feed_urls = set(config.feed_urls)
+    entries = {}
+    for entry in recent_entries:
+        if entry.feed_url in feed_urls:
+            entries.setdefault(entry.key, entry)
+    return list(entries.values())
+
+
+# Fonction pour construire l'édition de chaque newsletter à partir des articles récents de tous les flux,
+# déjà téléchargés une seule fois. Renvoie {nom: fichiers écrits, ou None en cas d'échec}.
+def build_tenant_editions(tenants, clients, recent_entries, seen_indexes, publish=True):
+    from auto_newsletter.pipeline import build_edition_from_entries
+
+    results = {}
+    for name, config in tenants.items():
+        print(f"Newsletter {name} :")
+        entries = entries_for_tenant(config, recent_entries)
+        report.set_counter(f"recent_entries_{name}", len(entries))
+        try:
+            results[name] = build_edition_from_entries(config, clients, entries, seen_indexes[name], publish=publish)
+        except Exception as e:
+            # L'échec d'une newsletter n'empêche pas la construction des suivantes
+            print(f"Échec de la génération de la newsletter {name} : {e}")
+            results[name] = None
+    return results
+
+
+# Fonction pour construire toutes les newsletters d'un fichier en un cycle : chaque flux est téléchargé et
+# analysé une seule fois, les notes et les réponses OpenAI sont partagées. Le coût croît avec le nombre
+# de flux et d'articles distincts, pas avec le nombre de newsletters.
+def build_all_editions(base_config, tenants, clients=None, publish=True):
+    from auto_newsletter.entry_store import EntryStore
+    from auto_newsletter.feeds import FeedCache, iter_feed_records
+    from auto_newsletter.pipeline import filter_recent_articles
+    from auto_newsletter.seen import SeenIndex
+
+    clients = clients if clients is not None else Clients(base_config)
+
+    feed_urls = unique_feed_urls(tenants)
+    feed_cache = FeedCache(base_config.cache_path("feeds"))
+    feed_cache.prune(set(feed_urls))
+    feed_records = iter_feed_records(feed_urls, max_workers=base_config.feed_workers,
+                                     timeout=base_config.feed_timeout, cache=feed_cache)
+    entry_store = EntryStore(base_config.cache_path("entries.sqlite3"),
+                             retention_days=base_config.entry_retention_days)
+    try:
+        entry_store.evict()
+        with report.stage("feeds"):
+            recent_entries = filter_recent_articles(entry_store.archive(feed_records))
+    finally:
+        entry_store.close()
+    report.set_counter("recent_entries", len(recent_entries))
+
+    seen_indexes = {name: SeenIndex(seen_index_path(config, name), retention_days=config.seen_retention_days)
+                    for name, config in tenants.items()}
+    try:
+        for seen_index in seen_indexes.values():
+            seen_index.evict()
+        return build_tenant_editions(tenants, clients, recent_entries, seen_indexes, publish=publish)
+    finally:
+        for seen_index in seen_indexes.values():
+            seen_index.close()
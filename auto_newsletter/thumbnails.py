@@ -0,0 +1,177 @@
+import concurrent.futures
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import time
+
+from auto_newsletter.feeds import DEFAULT_TIMEOUT, HostConnectionPool
+from auto_newsletter.render import ASSETS_DIRNAME, THUMBNAILS_DIRNAME
+from auto_newsletter.storage import open_db
+
+# Dimensions des cartes d'articles (ratio 16:9) ; la miniature est recadrée au centre puis réduite
+CARD_SIZE = (320, 180)
+DEFAULT_MAX_ENTRIES = 2000
+DEFAULT_MAX_WORKERS = 8
+# Au-delà, l'image n'est pas une miniature : elle est ignorée plutôt que décodée
+MAX_DOWNLOAD_BYTES = 10 * 1024 * 1024
+# Au-delà, l'image n'est pas décodée : un petit fichier peut décrire une image gigantesque
+MAX_IMAGE_PIXELS = 40_000_000
+# Un fichier plus récent a pu être écrit par un autre processus qui ne l'a pas encore indexé : il n'est pas évincé
+EVICTION_GRACE_SECONDS = 3600
+QUALITY = 75
+
+
+# Fonction pour réduire une image téléchargée au format des cartes ; renvoie (octets, extension).
+# WebP si Pillow le prend en charge, sinon JPEG.
+def resize_thumbnail(content):
+    from PIL import Image, ImageOps, features
+
+    # Image.open ne lit que l'en-tête : les dimensions sont vérifiées avant tout décodage. La limite est
+    # appliquée ici plutôt que par Image.MAX_IMAGE_PIXELS, réglage global au processus.
+    image = Image.open(io.BytesIO(content))
+    if image.width * image.height > MAX_IMAGE_PIXELS:
+        image.close()
+        raise Image.DecompressionBombError(f"Image trop grande ({image.width}x{image.height} pixels)")
+    with image:
+        # Les JPEG sont décodés directement à une résolution réduite, bien plus vite qu'en pleine taille
+        image.draft("RGB", (CARD_SIZE[0] * 2, CARD_SIZE[1] * 2))
+        image = ImageOps.exif_transpose(image)
+        webp = features.check("webp")
+        has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+        image = image.convert("RGBA" if webp and has_alpha else "RGB")
+        card = ImageOps.fit(image, CARD_SIZE, method=Image.Resampling.LANCZOS)
+    output = io.BytesIO()
+    if webp:
+        card.save(output, "WEBP", quality=QUALITY, method=4)
+        return output.getvalue(), "webp"
+    card.save(output, "JPEG", quality=QUALITY, optimize=True, progressive=True)
+    return output.getvalue(), "jpg"
+
+
+# Cache disque des miniatures réduites : un fichier par contenu (nommé d'après l'empreinte de l'image
+# d'origine, donc partagé par les URL qui servent la même image) et un index SQLite URL -> fichier.
+# Une URL déjà connue n'est plus téléchargée ; au-delà de max_entries, les URL utilisées le moins
+# récemment sont oubliées et les fichiers qu'aucune URL ne référence plus sont supprimés.
+class ThumbnailCache:
+    def __init__(self, cache_dir, max_entries=DEFAULT_MAX_ENTRIES):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self._db = open_db(os.path.join(cache_dir, "index.sqlite3"))
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS thumbnails ("
+            "url TEXT PRIMARY KEY, name TEXT NOT NULL, last_used INTEGER NOT NULL"
+            ") WITHOUT ROWID"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS thumbnails_last_used ON thumbnails (last_used)")
+        self._db.commit()
+
+    def path(self, name):
+        return os.path.join(self.cache_dir, name)
+
+    def _lookup(self, url):
+        row = self._db.execute("SELECT name FROM thumbnails WHERE url = ?", (url,)).fetchone()
+        if row is None or not os.path.exists(self.path(row[0])):
+            return None
+        return row[0]
+
+    # Télécharger une image et en produire la miniature si ce contenu n'est pas déjà en cache ; renvoie son nom
+    def _download(self, url, pool):
+        # Le corps est lu par morceaux et abandonné dès qu'il dépasse MAX_DOWNLOAD_BYTES
+        status, headers, content, _ = pool.get(url, {"Accept": "image/webp,image/*"}, max_bytes=MAX_DOWNLOAD_BYTES)
+        if status != 200:
+            raise OSError(f"Statut HTTP {status}")
+        digest = hashlib.sha256(content).hexdigest()[:20]
+        for name in (f"{digest}.webp", f"{digest}.jpg"):
+            if os.path.exists(self.path(name)):
+                return name
+        resized, extension = resize_thumbnail(content)
+        name = f"{digest}.{extension}"
+        # Écriture atomique : deux téléchargements du même contenu peuvent se terminer en même temps
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(resized)
+            os.replace(tmp_path, self.path(name))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return name
+
+    # Fonction pour obtenir les miniatures d'une liste d'URL, téléchargées en parallèle pour celles qui ne sont
+    # pas en cache. Renvoie le nom du fichier de chaque URL, dans l'ordre, ou None si elle est indisponible.
+    def fetch_all(self, urls, max_workers=DEFAULT_MAX_WORKERS, timeout=DEFAULT_TIMEOUT, now=None):
+        now = int(now if now is not None else time.time())
+        names = {url: self._lookup(url) for url in set(urls) if url}
+        missing = [url for url, name in names.items() if name is None]
+        if missing:
+            pool = HostConnectionPool(timeout=timeout)
+            try:
+                with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    futures = {executor.submit(self._download, url, pool): url for url in missing}
+                    for future in concurrent.futures.as_completed(futures):
+                        url = futures[future]
+                        try:
+                            names[url] = future.result()
+                        except Exception as e:
+                            print(f"Miniature indisponible ({url}) : {e}")
+            finally:
+                pool.close()
+
+        self._db.executemany(
+            "INSERT OR REPLACE INTO thumbnails (url, name, last_used) VALUES (?, ?, ?)",
+            ((url, name, now) for url, name in names.items() if name is not None),
+        )
+        self._db.commit()
+        self.evict()
+        return [names.get(url) for url in urls]
+
+    # Éviction LRU de l'index, puis suppression des fichiers qui ne sont plus référencés. Les fichiers récents
+    # sont conservés : un rattrapage parallèle a pu les écrire sans les avoir encore ajoutés à l'index.
+    def evict(self, now=None):
+        now = now if now is not None else time.time()
+        cursor = self._db.execute(
+            "DELETE FROM thumbnails WHERE url NOT IN "
+            "(SELECT url FROM thumbnails ORDER BY last_used DESC LIMIT ?)",
+            (self.max_entries,),
+        )
+        self._db.commit()
+        if cursor.rowcount <= 0:
+            return 0
+        referenced = {row[0] for row in self._db.execute("SELECT DISTINCT name FROM thumbnails")}
+        removed = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith((".webp", ".jpg")) or name in referenced:
+                continue
+            try:
+                if os.path.getmtime(self.path(name)) > now - EVICTION_GRACE_SECONDS:
+                    continue
+                os.remove(self.path(name))
+            except FileNotFoundError:
+                # Déjà supprimé par un autre processus
+                continue
+            removed += 1
+        return removed
+
+    # Copier des miniatures du cache dans le dossier des ressources d'une page si elles n'y sont pas déjà ;
+    # renvoie les fichiers correspondants. Une miniature disparue du cache entre-temps est ignorée.
+    def export(self, names, directory):
+        target_dir = os.path.join(directory, ASSETS_DIRNAME, THUMBNAILS_DIRNAME)
+        os.makedirs(target_dir, exist_ok=True)
+        paths = []
+        for name in names:
+            target = os.path.join(target_dir, name)
+            # Le nom dépend du contenu : un fichier déjà présent est forcément identique
+            if not os.path.exists(target):
+                try:
+                    shutil.copyfile(self.path(name), target)
+                except OSError as e:
+                    print(f"Miniature non copiée ({name}) : {e}")
+                    continue
+            paths.append(target)
+        return paths
+
+    def close(self):
+        self._db.close()
+
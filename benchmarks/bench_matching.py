@@ -0,0 +1,58 @@
+# Banc d'essai de la correspondance floue des titres : index TitleMatcher contre la double boucle fuzz.ratio
+# Utilisation : python benchmarks/bench_matching.py [--sizes 10000 100000] [--titles 15]
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fuzzywuzzy import fuzz  # noqa: E402
+
+from auto_newsletter.matching import TitleMatcher  # noqa: E402
+from fixtures import make_entries, perturb  # noqa: E402
+
+
+# Ancienne implémentation (fuzzywuzzy) : chaque article comparé à chaque titre sélectionné
+def naive_match(entries, top_titles, threshold=60):
+    cleaned_top_titles = [title.strip().lower() for title in top_titles]
+    matched = []
+    for entry in entries:
+        entry_title_cleaned = entry.title.strip().lower()
+        for top_title in cleaned_top_titles:
+            if fuzz.ratio(entry_title_cleaned, top_title) >= threshold:
+                matched.append(entry)
+                break
+    return matched
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--titles", type=int, default=15)
+    parser.add_argument("--naive-limit", type=int, default=10000,
+                        help="taille maximale pour laquelle la double boucle est mesurée")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    for size in args.sizes:
+        entries = make_entries(size, rng)
+        top_titles = [perturb(entry.title, rng) for entry in rng.sample(entries, args.titles)]
+
+        start = time.perf_counter()
+        matcher = TitleMatcher(entries)
+        built = time.perf_counter()
+        matched = matcher.match_all(top_titles)
+        done = time.perf_counter()
+        print(f"{size:>7} articles  index {built - start:7.3f}s  correspondance {done - built:7.3f}s  "
+              f"trouvés {len(matched)}/{args.titles}")
+
+        if size <= args.naive_limit:
+            start = time.perf_counter()
+            naive_match(entries, top_titles)
+            print(f"{size:>7} articles  double boucle {time.perf_counter() - start:7.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+# Banc d'essai du pipeline complet, hors ligne : flux RSS synthétiques servis en local, faux client OpenAI
+# déterministe, mesure de bout en bout et par fonction, comparaison à une référence enregistrée.
+# Utilisation :
+#   python benchmarks/bench_pipeline.py                      # mesurer et comparer à benchmarks/baseline.json
+#   python benchmarks/bench_pipeline.py --save-baseline      # enregistrer la référence
+# La référence dépend de la machine : elle est générée localement (--save-baseline) et n'est pas versionnée.
+#   python benchmarks/bench_pipeline.py --sizes 100 10000 --latency 0.05 --threshold 0.3
+# Le code de sortie vaut 1 si une mesure dépasse la référence de plus du seuil (ou si le nombre d'appels
+# OpenAI ou de jetons augmente, ces deux valeurs étant déterministes).
+import argparse
+import email.utils
+import functools
+import http.server
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_openai import FakeOpenAI  # noqa: E402
+from fixtures import WORDS, perturb  # noqa: E402
+
+from auto_newsletter.clients import Clients  # noqa: E402
+from auto_newsletter.config import Config  # noqa: E402
+from auto_newsletter.instrumentation import report  # noqa: E402
+from auto_newsletter.pipeline import (  # noqa: E402
+    build_edition,
+    entry_to_article,
+    filter_recent_articles,
+    generate_article_list,
+    get_top_articles_with_thumbnails,
+)
+from auto_newsletter.records import EntryRecord  # noqa: E402
+from auto_newsletter.render import render_edition  # noqa: E402
+
+DEFAULT_SIZES = [100, 10000, 100000]
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+ENTRIES_PER_FEED = 1000
+# Les dates sont réparties sur 30 jours : environ 1 article sur 30 est récent, comme un agrégat réel
+SPREAD_SECONDS = 30 * 86400
+# Mesures déterministes : toute augmentation est une régression, quel que soit le seuil
+EXACT_METRICS = {"llm_calls", "llm_total_tokens"}
+# Mesures de bout en bout, bruitées par le réseau local et l'ordonnanceur : plancher min_delta
+END_TO_END_METRICS = {"end_to_end"}
+
+
+# Fonction pour générer les articles synthétiques reproductibles d'une taille donnée : (titre, lien, date, miniature)
+def make_items(size, now, seed=42):
+    rng = random.Random(seed + size)
+    return [
+        (
+            " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 12))).capitalize() + f" {index}",
+            f"https://example.com/articles/{index}",
+            int(now - rng.uniform(0, SPREAD_SECONDS)),
+            f"https://example.com/images/{index}.jpg",
+        )
+        for index in range(size)
+    ]
+
+
+# Fonction pour écrire les articles en flux RSS 2.0 de ENTRIES_PER_FEED articles ; renvoie les noms de fichiers
+def write_feeds(items, directory):
+    names = []
+    for start in range(0, len(items), ENTRIES_PER_FEED):
+        name = f"feed{start // ENTRIES_PER_FEED}.xml"
+        parts = ['<?xml version="1.0" encoding="utf-8"?>\n'
+                 '<rss version="2.0" xmlns:media="http://search.yahoo.com/mrss/"><channel>'
+                 f"<title>Flux {name}</title><link>https://example.com/</link><description>Banc</description>"]
+        for title, link, published, thumbnail in items[start:start + ENTRIES_PER_FEED]:
+            parts.append(
+                f"<item><title>{title}</title><link>{link}</link><guid>{link}</guid>"
+                f"<pubDate>{email.utils.formatdate(published, usegmt=True)}</pubDate>"
+                f'<media:thumbnail url="{thumbnail}"/></item>'
+            )
+        parts.append("</channel></rss>")
+        with open(os.path.join(directory, name), "w", encoding="utf-8") as file:
+            file.write("".join(parts))
+        names.append(name)
+    return names
+
+
+# Serveur HTTP local servant les flux du dossier, dans un thread ; renvoie (serveur, URL de base)
+def serve_directory(directory):
+    handler = functools.partial(QuietHandler, directory=directory)
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+class QuietHandler(http.server.SimpleHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+
+# Fonction pour mesurer la durée d'un appel : boucles regroupées pour durer au moins 50 ms, médiane de repeat mesures
+def measure(function, repeat=5):
+    number = 1
+    while True:
+        elapsed = timeit.timeit(function, number=number)
+        if elapsed >= 0.05 or number >= 10000:
+            break
+        number *= 10
+    return statistics.median(timeit.timeit(function, number=number) / number for _ in range(repeat))
+
+
+# Mesures par fonction sur des enregistrements déjà normalisés
+def bench_functions(items, now, titles=15):
+    rng = random.Random(7)
+    records = [EntryRecord(link, title, link, published, thumbnail=thumbnail)
+               for title, link, published, thumbnail in items]
+    top_entries = rng.sample(records, min(titles, len(records)))
+    top_titles = [perturb(entry.title, rng) for entry in top_entries]
+    top_articles = [entry_to_article(entry) for entry in top_entries]
+    article_list_html = generate_article_list(top_articles)
+    introduction = "Introduction de l'édition.\nDeuxième ligne."
+
+    return {
+        "filter_recent_articles": measure(lambda: filter_recent_articles(records, now)),
+        "get_top_articles_with_thumbnails": measure(lambda: get_top_articles_with_thumbnails(records, top_titles)),
+        "generate_article_list": measure(lambda: generate_article_list(top_articles)),
+        "render_edition": measure(lambda: render_edition("Titre", introduction, article_list_html,
+                                                         "Conclusion.", "Post LinkedIn")),
+    }
+
+
+# Mesure de bout en bout : téléchargement, analyse, filtrage, déduplication, sélection, rédaction et écriture
+def bench_end_to_end(items, latency):
+    with tempfile.TemporaryDirectory() as directory:
+        feeds_dir = os.path.join(directory, "feeds")
+        os.makedirs(feeds_dir)
+        names = write_feeds(items, feeds_dir)
+        server, base_url = serve_directory(feeds_dir)
+        try:
+            config = Config(
+                feed_urls=[f"{base_url}/{name}" for name in names],
+                cache_dir=os.path.join(directory, "cache"),
+                newsletter_dir=os.path.join(directory, "newsletter"),
+                blog_dir=os.path.join(directory, "blog"),
+                # Le faux client n'a pas de quota : seule la latence simulée limite le débit
+                openai_requests_per_minute=10 ** 9,
+                openai_tokens_per_minute=10 ** 12,
+                publish_backend="none",
+                # Les miniatures des articles synthétiques pointent vers example.com : pas de téléchargement
+                thumbnails_enabled=False,
+            )
+            backend = FakeOpenAI(latency=latency)
+            report.reset()
+            start = time.perf_counter()
+            files = build_edition(config, Clients(config, backend=backend), publish=False)
+            elapsed = time.perf_counter() - start
+        finally:
+            server.shutdown()
+            server.server_close()
+    data = report.to_dict()
+    if not files:
+        raise RuntimeError("Le pipeline n'a produit aucune édition")
+    return {
+        "end_to_end": elapsed,
+        "llm_calls": data["llm"]["calls"],
+        "llm_total_tokens": data["llm"]["total_tokens"],
+        **{f"stage:{name}": stage["seconds"] for name, stage in data["stages"].items()},
+    }
+
+
+# Fonction pour comparer les mesures à la référence ; renvoie la liste des régressions.
+# Une durée n'est en régression que si elle dépasse la référence du seuil relatif et d'un plancher absolu :
+# min_delta secondes pour les mesures de bout en bout, min_function_delta (bien plus bas) pour les fonctions,
+# afin d'ignorer le bruit de quelques microsecondes sans masquer une hausse de quelques dizaines.
+def compare(results, baseline, threshold, min_delta=0.0, min_function_delta=0.0):
+    regressions = []
+    for size, metrics in results.items():
+        for name, value in metrics.items():
+            reference = baseline.get(size, {}).get(name)
+            # Les étapes détaillées sont indicatives : seules les mesures principales sont vérifiées
+            if reference is None or name.startswith("stage:"):
+                continue
+            if name in EXACT_METRICS:
+                regressed = value > reference
+            else:
+                floor = min_delta if name in END_TO_END_METRICS else min_function_delta
+                regressed = value > reference * (1 + threshold) and value - reference > floor
+            if regressed:
+                regressions.append(f"{size} articles, {name} : {value:.6g} (référence {reference:.6g})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Banc d'essai du pipeline complet")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--latency", type=float, default=0.02, help="latence simulée de chaque appel OpenAI (s)")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="hausse relative tolérée des durées avant de signaler une régression")
+    parser.add_argument("--min-delta", type=float, default=0.001,
+                        help="hausse absolue minimale (s) pour signaler une régression de bout en bout")
+    parser.add_argument("--min-function-delta", type=float, default=0.00002,
+                        help="hausse absolue minimale (s) pour signaler une régression d'une fonction")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="enregistrer les mesures comme référence")
+    parser.add_argument("--no-end-to-end", action="store_true", help="ne mesurer que les fonctions")
+    args = parser.parse_args()
+
+    now = time.time()
+    results = {}
+    for size in args.sizes:
+        items = make_items(size, now)
+        metrics = bench_functions(items, now)
+        if not args.no_end_to_end:
+            metrics.update(bench_end_to_end(items, args.latency))
+        results[str(size)] = metrics
+        for name, value in metrics.items():
+            unit = "" if name in EXACT_METRICS else " s"
+            print(f"{size:>7} articles  {name:<36} {value:.6g}{unit}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+        print(f"Référence enregistrée dans {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"Aucune référence ({args.baseline}) : relancer avec --save-baseline")
+        return
+    with open(args.baseline, encoding="utf-8") as file:
+        baseline = json.load(file)
+    regressions = compare(results, baseline, args.threshold, args.min_delta, args.min_function_delta)
+    for regression in regressions:
+        print(f"RÉGRESSION {regression}")
+    if regressions:
+        sys.exit(1)
+    print("Aucune régression par rapport à la référence.")
+
+
+if __name__ == "__main__":
+    main()
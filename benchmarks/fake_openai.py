@@ -0,0 +1,63 @@
+# Faux client OpenAI déterministe pour les bancs d'essai : même interface que le SDK (chat.completions.create),
+# réponses calculées à partir de la requête, latence configurable, aucun accès réseau
+import hashlib
+import json
+import re
+import threading
+import time
+from types import SimpleNamespace
+
+from openai.types.chat import ChatCompletion
+
+from auto_newsletter.ranking import count_tokens
+
+# Identifiants numérotés des prompts de sélection et de notation ("12. Titre")
+_NUMBERED_LINE = re.compile(r"^(\d+)\. ", re.MULTILINE)
+_LIMIT = re.compile(r"sélectionner les (\d+) meilleurs")
+
+
+class FakeOpenAI:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create_chat_completion))
+
+    # Note stable d'un titre : ne dépend que de son texte, comme une vraie note partagée
+    @staticmethod
+    def _score(line):
+        return int(hashlib.sha1(line.encode("utf-8")).hexdigest()[:4], 16) % 101
+
+    def _content(self, parameters):
+        prompt = parameters["messages"][-1]["content"]
+        if (parameters.get("response_format") or {}).get("type") == "json_object":
+            lines = {int(match.group(1)): line for line in prompt.splitlines()
+                     if (match := _NUMBERED_LINE.match(line))}
+            if '"scores"' in prompt:
+                return json.dumps({"scores": {str(index): self._score(line.split(". ", 1)[1])
+                                              for index, line in lines.items()}})
+            limit = int(_LIMIT.search(prompt).group(1)) if _LIMIT.search(prompt) else 15
+            ranked = sorted(lines, key=lambda index: -self._score(lines[index].split(". ", 1)[1]))
+            return json.dumps({"ids": ranked[:limit]})
+        digest = hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:8]
+        return f"Texte généré {digest}\nDeuxième ligne du texte généré."
+
+    def _create_chat_completion(self, **parameters):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.calls += 1
+        content = self._content(parameters)
+        model = parameters.get("model", "gpt-4o-mini-2024-07-18")
+        prompt_tokens = sum(count_tokens(message.get("content") or "", model) for message in parameters["messages"])
+        completion_tokens = count_tokens(content, model)
+        return ChatCompletion.model_validate({
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": 0,
+            "model": model,
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        })
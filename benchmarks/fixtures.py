@@ -0,0 +1,24 @@
+# Données synthétiques reproductibles partagées par les bancs d'essai
+from types import SimpleNamespace
+
+WORDS = (
+    "intelligence artificielle données cloud cybersécurité startup levée fonds marché emploi climat énergie "
+    "mobilité santé recherche université robotique semi-conducteurs régulation europe france innovation "
+    "quantique banque assurance industrie logistique retail marketing réseau social plateforme modèle langage "
+    "open source sécurité attaque vulnérabilité satellite spatial batterie hydrogène recrutement télétravail"
+).split()
+
+
+# Fonction pour générer des titres synthétiques reproductibles
+def make_entries(count, rng):
+    return [
+        SimpleNamespace(title=" ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 12))).capitalize() + f" {i}")
+        for i in range(count)
+    ]
+
+
+# Fonction pour simuler un titre reformulé par le modèle (guillemets, casse, mot supprimé)
+def perturb(title, rng):
+    words = title.split()
+    del words[rng.randrange(len(words))]
+    return f'"{" ".join(words).upper()}"'
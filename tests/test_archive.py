@@ -0,0 +1,36 @@
+import xml.etree.ElementTree as ET
+from datetime import datetime
+
+from auto_newsletter.archive import ArchiveStore, edition_record, update_archive
+
+ATOM = "{http://www.w3.org/2005/Atom}"
+
+
+def build_feed(tmp_path, name, **options):
+    blog = tmp_path / name
+    blog.mkdir()
+    store = ArchiveStore(str(tmp_path / f"{name}.sqlite3"))
+    try:
+        edition = edition_record("Édition du 02/01/2026", "Introduction", [{"title": "Robots", "link": "http://r"}],
+                                 datetime(2026, 1, 2))
+        update_archive(store, str(blog), edition, title="Veille IA", **options)
+    finally:
+        store.close()
+    return ET.parse(blog / "feed.xml").getroot()
+
+
+def test_feed_has_an_author(tmp_path):
+    feed = build_feed(tmp_path, "blog", author="Pierre & co")
+    assert feed.find(f"{ATOM}author/{ATOM}name").text == "Pierre & co"
+    # Sans auteur configuré, le titre du blog en tient lieu
+    feed = build_feed(tmp_path, "anonymous")
+    assert feed.find(f"{ATOM}author/{ATOM}name").text == "Veille IA"
+
+
+def test_feed_id_follows_the_public_address(tmp_path):
+    first = build_feed(tmp_path, "first", base_url="https://blog.example/")
+    second = build_feed(tmp_path, "second", base_url="https://blog.example")
+    local = build_feed(tmp_path, "local")
+    assert first.find(f"{ATOM}id").text == second.find(f"{ATOM}id").text
+    assert first.find(f"{ATOM}id").text != local.find(f"{ATOM}id").text
+    assert first.find(f"{ATOM}entry/{ATOM}id").text == second.find(f"{ATOM}entry/{ATOM}id").text
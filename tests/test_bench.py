@@ -0,0 +1,33 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from bench_pipeline import compare  # noqa: E402
+
+BASELINE = {"100": {"end_to_end": 0.3, "render_edition": 20e-6, "filter_recent_articles": 10e-6, "llm_calls": 5}}
+
+
+def test_function_regressions_above_the_function_floor_are_reported():
+    results = {"100": {"end_to_end": 0.3, "render_edition": 80e-6, "llm_calls": 5}}
+    assert compare(results, BASELINE, 0.25, min_delta=0.001, min_function_delta=20e-6) == [
+        "100 articles, render_edition : 8e-05 (référence 2e-05)"
+    ]
+
+
+def test_function_jitter_below_the_function_floor_is_ignored():
+    results = {"100": {"filter_recent_articles": 18e-6, "render_edition": 30e-6}}
+    assert compare(results, BASELINE, 0.25, min_delta=0.001, min_function_delta=20e-6) == []
+
+
+def test_min_delta_absorbs_end_to_end_noise():
+    results = {"100": {"end_to_end": 0.3 * 1.3 + 0.0005, "render_edition": 21e-6, "llm_calls": 5}}
+    assert compare(results, BASELINE, 0.25, min_delta=0.2) == []
+    assert len(compare(results, BASELINE, 0.25, min_delta=0.001)) == 1
+
+
+def test_exact_metrics_ignore_thresholds():
+    results = {"100": {"llm_calls": 6}}
+    assert compare(results, BASELINE, 0.25, min_delta=1.0, min_function_delta=1.0) == [
+        "100 articles, llm_calls : 6 (référence 5)"
+    ]
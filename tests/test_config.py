@@ -0,0 +1,16 @@
+import os
+
+from dotenv import dotenv_values
+
+from auto_newsletter.config import Config
+
+EXAMPLE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".env.exemple")
+
+
+def test_example_environment_loads_as_is(tmp_path, monkeypatch):
+    # Copie telle quelle de .env.exemple, sans aucun fichier annexe (feeds.txt, newsletters.json...)
+    monkeypatch.chdir(tmp_path)
+    for name, value in dotenv_values(EXAMPLE).items():
+        monkeypatch.setenv(name, value or "")
+    config = Config.from_env(dotenv=False)
+    assert config.feed_urls
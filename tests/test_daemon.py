@@ -0,0 +1,35 @@
+from auto_newsletter import feeds
+from auto_newsletter.config import Config
+from auto_newsletter.daemon import NewsletterDaemon
+from auto_newsletter.records import EntryRecord
+
+FEED_URL = "https://example.com/feed.xml"
+
+
+def make_records(titles):
+    return [EntryRecord(f"key-{index}", title, f"https://example.com/{index}", 1700000000 + index, FEED_URL)
+            for index, title in enumerate(titles)]
+
+
+def poll(daemon, monkeypatch, records):
+    monkeypatch.setattr(feeds, "fetch_feed", lambda url, pool, cache: records)
+    daemon.schedule.reschedule(FEED_URL, changed=True, now=0)
+    return daemon.poll_feeds()
+
+
+def test_only_new_content_counts_as_a_change(tmp_path, monkeypatch):
+    config = Config(cache_dir=str(tmp_path / "cache"), feed_urls=[FEED_URL])
+    daemon = NewsletterDaemon(config, clients=object(), publish=False)
+    daemon.schedule.pop_due()
+    try:
+        first = make_records(["Premier", "Second"])
+        assert poll(daemon, monkeypatch, first) == 1
+        # Réponse 304 : la même liste est renvoyée
+        assert poll(daemon, monkeypatch, first) == 0
+        # Réponse 200 sans validateurs : nouvelle liste, même contenu
+        assert poll(daemon, monkeypatch, make_records(["Premier", "Second"])) == 0
+        assert daemon.schedule.intervals[FEED_URL] > daemon.schedule.min_interval
+        assert poll(daemon, monkeypatch, make_records(["Premier", "Second", "Troisième"])) == 1
+        assert daemon.schedule.intervals[FEED_URL] == daemon.schedule.min_interval
+    finally:
+        daemon.close()
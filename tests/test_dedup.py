@@ -0,0 +1,54 @@
+import sqlite3
+
+import numpy as np
+import pytest
+
+from auto_newsletter.dedup import EmbeddingCache
+
+DAY = 86400
+
+
+def vectors(*keys):
+    return [(key, np.full(4, index, dtype=np.float32)) for index, key in enumerate(keys)]
+
+
+def test_unused_vectors_expire_after_retention(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "embeddings.sqlite3"), retention_days=30)
+    try:
+        cache.put_many("hashing", vectors("a", "b"), now=0)
+        # "a" est relu plus tard : il reste en cache, "b" non
+        assert set(cache.get_many("hashing", ["a"], now=20 * DAY)) == {"a"}
+        assert cache.evict(now=40 * DAY) == 1
+        found = cache.get_many("hashing", ["a", "b"], now=40 * DAY)
+    finally:
+        cache.close()
+    assert list(found) == ["a"]
+    np.testing.assert_array_equal(found["a"], np.zeros(4, dtype=np.float32))
+
+
+def test_caches_without_last_used_are_rebuilt(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite3")
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE embeddings (embedder TEXT NOT NULL, key TEXT NOT NULL, vector BLOB NOT NULL, "
+               "PRIMARY KEY (embedder, key)) WITHOUT ROWID")
+    db.execute("INSERT INTO embeddings VALUES ('hashing', 'a', ?)", (np.ones(4, dtype=np.float32).tobytes(),))
+    db.commit()
+    db.close()
+    cache = EmbeddingCache(path)
+    try:
+        assert cache.get_many("hashing", ["a"]) == {}
+        cache.put_many("hashing", vectors("a"))
+        assert set(cache.get_many("hashing", ["a"])) == {"a"}
+    finally:
+        cache.close()
+
+
+@pytest.mark.parametrize("count", [0, 1200])
+def test_batches_beyond_the_parameter_limit(tmp_path, count):
+    keys = [f"key-{index}" for index in range(count)]
+    cache = EmbeddingCache(str(tmp_path / "embeddings.sqlite3"))
+    try:
+        cache.put_many("hashing", vectors(*keys))
+        assert len(cache.get_many("hashing", keys)) == count
+    finally:
+        cache.close()
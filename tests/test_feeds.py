@@ -0,0 +1,149 @@
+import http.server
+import os
+import threading
+import time
+
+import feedparser
+import pytest
+
+from auto_newsletter.feeds import FeedCache, HostConnectionPool, fetch_feed, iter_feed_records
+
+ETAG = '"v1"'
+LAST_MODIFIED = "Mon, 05 Jan 2026 08:00:00 GMT"
+
+
+def rss(name, count=3):
+    items = "".join(
+        f"<item><title>{name} article {index}</title><link>https://example.com/{name}/{index}</link>"
+        f"<pubDate>Mon, 05 Jan 2026 0{index}:00:00 GMT</pubDate></item>"
+        for index in range(count)
+    )
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>{name}</title>{items}</channel></rss>'.encode()
+
+
+# Serveur de flux local : chaque instance joue le rôle d'un hôte distinct (hôte et port différents pour le pool)
+class FeedServer:
+    def __init__(self, delay=0.0):
+        self.requests = []
+        self.connections = set()
+        server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                server.requests.append((self.path, dict(self.headers)))
+                server.connections.add(self.client_address)
+                if self.path == "/slow.xml":
+                    time.sleep(1.5)
+                if self.path == "/broken.xml":
+                    return self._send(500, b"erreur")
+                if self.path == "/moved.xml":
+                    return self._send(301, b"", {"Location": "/feed.xml"})
+                if self.path == "/cached.xml" and self.headers.get("If-None-Match") == ETAG:
+                    return self._send(304, b"")
+                time.sleep(delay)
+                self._send(200, rss(self.path.strip("/").split(".")[0]),
+                           {"Content-Type": "application/rss+xml", "ETag": ETAG, "Last-Modified": LAST_MODIFIED})
+
+            def _send(self, status, body, headers=None):
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def url(self, path):
+        return f"{self.base_url}{path}"
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def servers():
+    started = [FeedServer(delay=0.3), FeedServer(delay=0.3)]
+    yield started
+    for server in started:
+        server.close()
+
+
+def test_feeds_are_fetched_concurrently_across_hosts(servers):
+    urls = [server.url(f"/{name}.xml") for server in servers for name in ("a", "b", "c")]
+    started = time.monotonic()
+    records = list(iter_feed_records(urls, max_workers=6, timeout=5))
+    # Six flux de 0,3 s chacun : en série, il faudrait au moins 1,8 s
+    assert time.monotonic() - started < 1.2
+    assert len(records) == 18
+    assert {record.feed_url for record in records} == set(urls)
+
+
+def test_failing_and_slow_feeds_are_skipped(servers, capsys):
+    server = servers[0]
+    urls = [server.url("/a.xml"), server.url("/broken.xml"), server.url("/slow.xml"), "http://127.0.0.1:9/down.xml"]
+    records = list(iter_feed_records(urls, max_workers=4, timeout=0.5))
+    assert {record.feed_url for record in records} == {server.url("/a.xml")}
+    assert capsys.readouterr().out.count("Impossible de récupérer le flux") == 3
+
+
+def test_connections_are_reused_per_host(servers):
+    server = servers[0]
+    pool = HostConnectionPool(timeout=5)
+    try:
+        for name in ("a", "b", "c"):
+            assert pool.get(server.url(f"/{name}.xml"))[0] == 200
+    finally:
+        pool.close()
+    assert len(server.requests) == 3
+    assert len(server.connections) == 1
+
+
+def test_redirects_are_followed(servers):
+    pool = HostConnectionPool(timeout=5)
+    try:
+        status, _, _, final_url = pool.get(servers[0].url("/moved.xml"))
+        records = fetch_feed(servers[0].url("/moved.xml"), pool)
+    finally:
+        pool.close()
+    assert (status, final_url) == (200, servers[0].url("/feed.xml"))
+    assert [record.title for record in records] == [f"feed article {index}" for index in range(3)]
+
+
+def test_unchanged_feeds_are_served_from_the_cache(servers, tmp_path, monkeypatch):
+    server = servers[0]
+    cache = FeedCache(str(tmp_path / "feeds"))
+    pool = HostConnectionPool(timeout=5)
+    try:
+        first = fetch_feed(server.url("/cached.xml"), pool, cache)
+
+        def unexpected_parse(*args, **kwargs):
+            raise AssertionError("feedparser ne doit pas analyser une réponse 304")
+
+        monkeypatch.setattr(feedparser, "parse", unexpected_parse)
+        second = fetch_feed(server.url("/cached.xml"), pool, cache)
+    finally:
+        pool.close()
+    assert [record.key for record in second] == [record.key for record in first]
+    _, headers = server.requests[-1]
+    assert headers["If-None-Match"] == ETAG
+    assert headers["If-Modified-Since"] == LAST_MODIFIED
+
+
+def test_cache_of_removed_feeds_is_pruned(tmp_path):
+    cache = FeedCache(str(tmp_path / "feeds"), keep_in_memory=True)
+    for url in ("https://a/feed.xml", "https://b/feed.xml"):
+        cache.set(url, ETAG, None, [])
+    assert cache.prune({"https://a/feed.xml"}) == 1
+    assert len(os.listdir(tmp_path / "feeds")) == 1
+    assert cache.get("https://a/feed.xml") is not None
+    assert cache.get("https://b/feed.xml") is None
@@ -0,0 +1,54 @@
+import concurrent.futures
+
+import pytest
+
+pytest.importorskip("openai")
+from openai.types.chat import ChatCompletion  # noqa: E402
+
+from auto_newsletter.llm_cache import CachedClient  # noqa: E402
+
+
+class EchoClient:
+    def __init__(self):
+        self.chat = self
+        self.completions = self
+        self.calls = 0
+
+    def create(self, **parameters):
+        self.calls += 1
+        return ChatCompletion.model_validate({
+            "id": "echo", "object": "chat.completion", "created": 0, "model": parameters["model"],
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": parameters["messages"][-1]["content"]}}],
+        })
+
+
+def ask(client, text):
+    return client.chat.completions.create(model="gpt-test", messages=[{"role": "user", "content": text}])
+
+
+def test_counters_are_exact_under_concurrency(tmp_path):
+    cache = CachedClient(EchoClient(), str(tmp_path / "llm.sqlite3"))
+    try:
+        ask(cache, "question")
+        with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+            answers = list(executor.map(lambda _: ask(cache, "question"), range(200)))
+    finally:
+        cache.close()
+    assert {answer.choices[0].message.content for answer in answers} == {"question"}
+    assert (cache.hits, cache.misses) == (200, 1)
+
+
+def test_least_recently_used_responses_are_evicted_past_max_entries(tmp_path):
+    backend = EchoClient()
+    cache = CachedClient(backend, str(tmp_path / "llm.sqlite3"), max_entries=2)
+    try:
+        for text in ("a", "b", "a", "c"):
+            ask(cache, text)
+        assert cache._db.execute("SELECT COUNT(*) FROM responses").fetchone() == (2,)
+        ask(cache, "a")
+        ask(cache, "b")
+    finally:
+        cache.close()
+    assert backend.calls == 4
+    assert (cache.hits, cache.misses) == (2, 4)
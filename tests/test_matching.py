@@ -0,0 +1,49 @@
+import importlib
+import sys
+import warnings
+
+import pytest
+
+from auto_newsletter.records import EntryRecord
+
+TITLES = [
+    "Apple lance un nouvel iPhone",
+    "La BCE relève ses taux directeurs",
+    "Un rapport alerte sur la sécheresse en Europe",
+]
+
+
+def make_entries():
+    return [EntryRecord(f"key-{index}", title, f"https://example.com/{index}", 0) for index, title in enumerate(TITLES)]
+
+
+@pytest.fixture(params=["rapidfuzz", "fuzzywuzzy"])
+def matching(request, monkeypatch):
+    if request.param == "fuzzywuzzy":
+        # Bloquer rapidfuzz force le repli documenté sur fuzzywuzzy
+        monkeypatch.setitem(sys.modules, "rapidfuzz", None)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            module = importlib.reload(importlib.import_module("auto_newsletter.matching"))
+        assert module.process.__name__.startswith("fuzzywuzzy")
+    else:
+        module = importlib.import_module("auto_newsletter.matching")
+    yield module
+    monkeypatch.undo()
+    importlib.reload(module)
+
+
+def test_exact_match(matching):
+    matcher = matching.TitleMatcher(make_entries())
+    assert matcher.match_index("la bce releve ses taux directeurs") == 1
+
+
+def test_fuzzy_match_through_full_scan(matching):
+    matcher = matching.TitleMatcher(make_entries())
+    # Aucun mot en commun avec l'index : seule la comparaison avec tous les titres peut trouver l'article
+    assert matcher.match_index("Appel lanc un nouvl iPhon") == 0
+
+
+def test_no_match_below_threshold(matching):
+    matcher = matching.TitleMatcher(make_entries())
+    assert matcher.match_index("Résultats du championnat de football") is None
@@ -0,0 +1,112 @@
+import json
+import threading
+from types import SimpleNamespace
+
+from openai.types.chat import ChatCompletion
+
+from auto_newsletter.clients import Clients
+from auto_newsletter.config import Config
+from auto_newsletter.pipeline import compose_edition, write_run_report
+from auto_newsletter.records import EntryRecord
+
+
+# Faux client OpenAI : la sélection renvoie les identifiants demandés, les autres appels un texte fixe
+class FakeOpenAI:
+    def __init__(self, selected_ids):
+        self.selected_ids = selected_ids
+        self.prompts = []
+        self.requests = []
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **parameters):
+        with self._lock:
+            self.prompts.append(parameters["messages"][-1]["content"])
+            self.requests.append(parameters)
+        if (parameters.get("response_format") or {}).get("type") == "json_object":
+            content = json.dumps({"ids": self.selected_ids})
+        else:
+            content = "Texte généré"
+        return ChatCompletion.model_validate({
+            "id": "chatcmpl-test",
+            "object": "chat.completion",
+            "created": 0,
+            "model": parameters["model"],
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+        })
+
+
+def make_config(tmp_path, **overrides):
+    return Config(
+        cache_dir=str(tmp_path / "cache"),
+        newsletter_dir=str(tmp_path / "newsletter"),
+        blog_dir=str(tmp_path / "blog"),
+        llm_cache_enabled=False,
+        dedup_enabled=False,
+        thumbnails_enabled=False,
+        publish_backend="none",
+        **overrides,
+    )
+
+
+def make_entries():
+    return [EntryRecord(f"key-{index}", f"Article numéro {index}", f"https://example.com/{index}", 1700000000 + index)
+            for index in range(5)]
+
+
+def test_empty_selection_skips_text_generation(tmp_path):
+    config = make_config(tmp_path)
+    backend = FakeOpenAI(selected_ids=[])
+    assert compose_edition(config, Clients(config, backend=backend), make_entries()) == []
+    # Seul l'appel de sélection a été payé
+    assert len(backend.prompts) == 1
+
+
+def test_edition_generates_texts_and_pages(tmp_path):
+    config = make_config(tmp_path)
+    backend = FakeOpenAI(selected_ids=[2, 0])
+    files = compose_edition(config, Clients(config, backend=backend), make_entries())
+    # Sélection, puis introduction, conclusion, titre et post LinkedIn
+    assert len(backend.prompts) == 5
+    pages = [path for path in files if path.endswith(".html") and "archive" not in path and "index" not in path]
+    assert len(pages) == 2
+    with open(pages[0], encoding="utf-8") as file:
+        page = file.read()
+    assert "Article numéro 2" in page and "Article numéro 0" in page
+
+
+def test_introduction_and_conclusion_are_specific_to_each_edition(tmp_path):
+    from datetime import datetime
+
+    config = make_config(tmp_path)
+    prompts = []
+    for day in (1, 2):
+        backend = FakeOpenAI(selected_ids=[0])
+        compose_edition(config, Clients(config, backend=backend), make_entries(), edition_date=datetime(2025, 3, day))
+        prompts.append(set(backend.prompts))
+    # Même sélection, jours différents : l'introduction et la conclusion n'ont pas le même prompt (ni donc
+    # la même réponse en cache)
+    shared = prompts[0] & prompts[1]
+    assert not any("introduction" in prompt or "conclusion" in prompt for prompt in shared)
+
+
+def test_tenant_persona_and_instructions_reach_the_prompts(tmp_path):
+    config = make_config(tmp_path, editorial_persona="Ton d'analyste financier",
+                         introduction_instructions="Introduction en une phrase.")
+    backend = FakeOpenAI(selected_ids=[0])
+    compose_edition(config, Clients(config, backend=backend), make_entries())
+    writing = [request["messages"] for request in backend.requests if "response_format" not in request]
+    assert len(writing) == 4
+    assert all("Ton d'analyste financier" in messages[0]["content"] for messages in writing)
+    assert any(messages[-1]["content"].endswith("Introduction en une phrase.") for messages in writing)
+
+
+def test_each_run_appends_its_own_report(tmp_path):
+    config = make_config(tmp_path)
+    write_run_report(config)
+    write_run_report(config)
+    with open(tmp_path / "newsletter" / "reports.jsonl", encoding="utf-8") as file:
+        reports = [json.loads(line) for line in file]
+    assert len(reports) == 2
+    assert {"started", "stages", "llm", "counters"} <= set(reports[0])
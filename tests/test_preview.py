@@ -0,0 +1,40 @@
+import threading
+import time
+import urllib.request
+
+from auto_newsletter.preview import EditionPreview, PreviewServer
+
+
+def start_server():
+    preview = EditionPreview()
+    server = PreviewServer(preview, port=0)
+    server.start()
+    return preview, server
+
+
+def test_linger_returns_once_the_page_received_the_edition():
+    preview, server = start_server()
+    try:
+        preview.update("introduction", "Bonjour")
+        events = []
+        reader = threading.Thread(
+            target=lambda: events.append(urllib.request.urlopen(f"{server.url}events", timeout=10).read()))
+        reader.start()
+        time.sleep(0.2)
+        started = time.monotonic()
+        assert server.linger(timeout=10)
+        assert time.monotonic() - started < 5
+        reader.join(5)
+    finally:
+        server.close()
+    assert b"Bonjour" in events[0] and b"event: done" in events[0]
+
+
+def test_linger_is_bounded_without_any_reader():
+    _, server = start_server()
+    try:
+        started = time.monotonic()
+        assert not server.linger(timeout=0.3)
+        assert time.monotonic() - started < 2
+    finally:
+        server.close()
@@ -0,0 +1,64 @@
+import subprocess
+
+import pytest
+
+from auto_newsletter.config import Config
+from auto_newsletter.pipeline import create_publisher, publish_files
+from auto_newsletter.publish import DirectoryPublisher, GitPublisher, Publisher, PublishError
+
+
+def test_publisher_is_abstract():
+    with pytest.raises(TypeError):
+        Publisher()
+
+
+def test_directory_publisher_requires_a_target(tmp_path):
+    with pytest.raises(PublishError):
+        DirectoryPublisher(str(tmp_path), None)
+
+
+def test_missing_target_is_reported_as_a_publish_error(tmp_path, capsys):
+    page = tmp_path / "page.html"
+    page.write_text("<html></html>")
+    config = Config(publish_backend="directory", publish_repo_dir=str(tmp_path), publish_target_dir=None)
+    publish_files(config, [str(page)], "Édition")
+    assert "PUBLISH_TARGET_DIR" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("backend", ["gti", "", "Git"])
+def test_unknown_backends_are_rejected(backend):
+    with pytest.raises(PublishError, match="inconnu"):
+        create_publisher(Config(publish_backend=backend))
+
+
+def test_git_backend_requires_a_remote_or_token(tmp_path):
+    with pytest.raises(PublishError, match="GIT_TOKEN"):
+        create_publisher(Config(publish_backend="git", publish_repo_dir=str(tmp_path)))
+    publisher = create_publisher(Config(publish_backend="git", publish_repo_dir=str(tmp_path), git_token="jeton"))
+    assert "None" not in publisher.remote_url
+
+
+def test_none_backend_disables_publishing():
+    assert create_publisher(Config(publish_backend="none")) is None
+
+
+def test_directory_publisher_copies_staged_files(tmp_path):
+    source = tmp_path / "source"
+    (source / "assets").mkdir(parents=True)
+    (source / "assets" / "style.css").write_text("body {}")
+    publisher = DirectoryPublisher(str(source), str(tmp_path / "target"))
+    publisher.stage([str(source / "assets" / "style.css")])
+    assert publisher.publish("Édition")
+    assert (tmp_path / "target" / "assets" / "style.css").read_text() == "body {}"
+    assert not publisher.publish("Édition")
+
+
+def test_git_errors_never_contain_the_token(tmp_path):
+    repo = tmp_path / "repo"
+    subprocess.run(["git", "init", "-q", str(repo)], check=True)
+    # git reproduit tel quel un dépôt distant introuvable dans son message d'erreur
+    remote_url = str(tmp_path / "secret-token" / "depot.git")
+    publisher = GitPublisher(str(repo), remote_url)
+    with pytest.raises(PublishError) as error:
+        publisher._git("push", remote_url, "HEAD:main")
+    assert "secret-token" not in str(error.value)
@@ -0,0 +1,116 @@
+import http.server
+import json
+import multiprocessing
+import threading
+import time
+
+import pytest
+from openai import OpenAI, RateLimitError
+
+from auto_newsletter.ratelimit import RateLimitedClient, TokenBucket, shared_bucket_state
+
+COMPLETION = {
+    "id": "chatcmpl-test",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "gpt-4o-mini-2024-07-18",
+    "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "ok"}}],
+    "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+}
+EMBEDDINGS = {
+    "object": "list",
+    "model": "text-embedding-3-small",
+    "data": [{"object": "embedding", "index": 0, "embedding": [0.6, 0.8]}],
+    "usage": {"prompt_tokens": 3, "total_tokens": 3},
+}
+
+
+# Faux serveur OpenAI : répond 429 avec Retry-After aux `failures` premières requêtes, puis normalement
+@pytest.fixture
+def fake_server():
+    state = {"requests": [], "failures": 0, "retry_after": "0.2"}
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers["Content-Length"]))
+            state["requests"].append(time.monotonic())
+            if len(state["requests"]) <= state["failures"]:
+                body = json.dumps({"error": {"message": "Rate limit", "type": "rate_limit_error"}}).encode()
+                self.send_response(429)
+                self.send_header("Retry-After", state["retry_after"])
+            else:
+                body = json.dumps(EMBEDDINGS if self.path.endswith("/embeddings") else COMPLETION).encode()
+                self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    backend = OpenAI(api_key="test", base_url=f"http://127.0.0.1:{server.server_address[1]}/v1", max_retries=0)
+    yield state, backend
+    server.shutdown()
+    server.server_close()
+
+
+def create(client):
+    return client.chat.completions.create(model="gpt-4o-mini-2024-07-18", messages=[{"role": "user", "content": "x"}])
+
+
+def test_retries_after_429_honouring_retry_after(fake_server):
+    state, backend = fake_server
+    state["failures"] = 2
+    client = RateLimitedClient(backend, max_retries=3)
+    response = create(client)
+    assert response.choices[0].message.content == "ok"
+    assert client.retries == 2
+    first, second, third = state["requests"]
+    # Le délai Retry-After du serveur est respecté entre deux essais
+    assert second - first >= 0.2
+    assert third - second >= 0.2
+
+
+def test_gives_up_after_max_retries(fake_server):
+    state, backend = fake_server
+    state["failures"] = 10
+    state["retry_after"] = "0"
+    client = RateLimitedClient(backend, max_retries=2)
+    with pytest.raises(RateLimitError):
+        create(client)
+    assert len(state["requests"]) == 3
+
+
+def _consume(state):
+    TokenBucket(2, shared_state=state).acquire()
+
+
+def test_shared_bucket_is_consumed_across_processes():
+    context = multiprocessing.get_context("spawn")
+    # Deux requêtes par minute : deux processus épuisent le seau commun
+    state = shared_bucket_state(context, 2)
+    processes = [context.Process(target=_consume, args=(state,)) for _ in range(2)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(30)
+        assert process.exitcode == 0
+    assert state[0] < 1
+
+
+def test_embeddings_are_rate_limited_retried_and_reported(fake_server):
+    from auto_newsletter.instrumentation import InstrumentedClient, RunReport
+
+    state, backend = fake_server
+    state["failures"] = 1
+    run_report = RunReport()
+    limited = RateLimitedClient(backend, base_delay=0.01)
+    client = InstrumentedClient(limited, run_report=run_report)
+    response = client.embeddings.create(model="text-embedding-3-small", input=["Un titre"])
+    assert response.data[0].embedding == [0.6, 0.8]
+    assert limited.retries == 1
+    assert run_report.to_dict()["llm"]["calls"] == 1
+    assert run_report.to_dict()["llm"]["prompt_tokens"] == 3
@@ -0,0 +1,31 @@
+import pickle
+
+import feedparser
+
+from auto_newsletter.records import EntryRecord, iter_records
+
+FEED = b"""<?xml version="1.0"?>
+<rss version="2.0" xmlns:media="http://search.yahoo.com/mrss/"><channel><title>Flux</title>
+<item><title>Avec miniature</title><link>https://example.com/1</link>
+<media:thumbnail url="https://example.com/1.jpg" width="640" height="360"/></item>
+<item><title>Avec contenu</title><link>https://example.com/2</link>
+<media:content url="https://example.com/2.jpg" medium="image" type="image/jpeg"/></item>
+<item><title>Sans image</title><link>https://example.com/3</link></item>
+</channel></rss>"""
+
+
+def test_only_the_thumbnail_url_is_kept():
+    records = list(iter_records(feedparser.parse(FEED).entries, "https://example.com/feed.xml"))
+    assert [record.thumbnail for record in records] == ["https://example.com/1.jpg", "https://example.com/2.jpg", ""]
+    state = pickle.loads(pickle.dumps(records[0])).__getstate__()
+    assert state["thumbnail"] == "https://example.com/1.jpg"
+    assert all(isinstance(value, (str, int, type(None))) for value in state.values())
+
+
+def test_records_pickled_with_media_lists_are_still_readable():
+    record = EntryRecord.__new__(EntryRecord)
+    record.__setstate__({"key": "k", "title": "Titre", "link": "https://example.com", "published": 0,
+                         "feed_url": None, "_media": [{"url": "https://example.com/a.jpg", "width": "640"}]})
+    assert record.thumbnail == "https://example.com/a.jpg"
+    record.__setstate__({"key": "k", "title": "Titre", "link": "", "published": 0, "feed_url": None, "_media": None})
+    assert record.thumbnail == ""
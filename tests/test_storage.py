@@ -0,0 +1,51 @@
+import threading
+import time
+
+from auto_newsletter.records import EntryRecord
+from auto_newsletter.seen import SeenIndex
+from auto_newsletter.storage import open_db
+from auto_newsletter.thumbnails import ThumbnailCache
+
+
+def test_open_db_creates_the_directory_and_uses_wal(tmp_path):
+    db = open_db(str(tmp_path / "nested" / "store.sqlite3"))
+    try:
+        assert db.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+    finally:
+        db.close()
+
+
+def test_writers_wait_for_a_concurrent_lock(tmp_path):
+    path = str(tmp_path / "seen.sqlite3")
+    seen_index = SeenIndex(path)
+    assert seen_index._db.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+    locked = threading.Event()
+
+    # Un autre processus (démon, rattrapage) tient le verrou d'écriture un court instant
+    def hold_lock():
+        db = open_db(path)
+        db.execute("BEGIN IMMEDIATE")
+        locked.set()
+        time.sleep(0.5)
+        db.commit()
+        db.close()
+
+    holder = threading.Thread(target=hold_lock)
+    holder.start()
+    try:
+        locked.wait(5)
+        started = time.monotonic()
+        seen_index.mark_seen([EntryRecord("key", "Titre", "https://example.com", 0)])
+        assert time.monotonic() - started >= 0.3
+        assert seen_index.filter_unseen([EntryRecord("key", "Titre", "https://example.com", 0)]) == []
+    finally:
+        holder.join()
+        seen_index.close()
+
+
+def test_thumbnail_index_is_shared_safely(tmp_path):
+    cache = ThumbnailCache(str(tmp_path / "thumbnails"))
+    try:
+        assert cache._db.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+    finally:
+        cache.close()
@@ -0,0 +1,138 @@
+import gzip
+import http.server
+import io
+import os
+import threading
+import time
+
+import pytest
+
+PIL = pytest.importorskip("PIL")
+from PIL import Image  # noqa: E402
+
+from auto_newsletter import thumbnails  # noqa: E402
+from auto_newsletter.feeds import HostConnectionPool, ResponseTooLarge  # noqa: E402
+from auto_newsletter.thumbnails import ThumbnailCache, resize_thumbnail  # noqa: E402
+
+CAP = 64 * 1024
+
+
+def png(size, mode="RGB"):
+    output = io.BytesIO()
+    Image.new(mode, size).save(output, "PNG")
+    return output.getvalue()
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if self.path == "/image.png":
+            self._send(png((640, 360)))
+        elif self.path == "/declared.bin":
+            # Annonce une taille excessive : rien ne doit être lu
+            self.send_response(200)
+            self.send_header("Content-Length", str(CAP * 100))
+            self.end_headers()
+        elif self.path == "/endless.bin":
+            # Sans taille annoncée et sans fin : seule une lecture bornée peut s'arrêter
+            self.send_response(200)
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            chunk = b"x" * 16384
+            try:
+                while True:
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+            except OSError:
+                pass
+        elif self.path == "/bomb.gz":
+            self._send(gzip.compress(b"\0" * CAP * 100), {"Content-Encoding": "gzip"})
+        else:
+            self.send_error(404)
+
+    def _send(self, body, headers=None):
+        self.send_response(200)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def base_url():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def pool():
+    pool = HostConnectionPool(timeout=5)
+    yield pool
+    pool.close()
+
+
+def test_small_responses_are_read_in_full(base_url, pool):
+    status, _, body, _ = pool.get(f"{base_url}/image.png", max_bytes=CAP)
+    assert status == 200
+    assert Image.open(io.BytesIO(body)).size == (640, 360)
+
+
+@pytest.mark.parametrize("path", ["/declared.bin", "/endless.bin", "/bomb.gz"])
+def test_oversized_responses_are_rejected(base_url, pool, path):
+    with pytest.raises(ResponseTooLarge):
+        pool.get(f"{base_url}{path}", max_bytes=CAP)
+
+
+def test_decompression_bombs_are_refused(monkeypatch):
+    default_limit = Image.MAX_IMAGE_PIXELS
+    monkeypatch.setattr(thumbnails, "MAX_IMAGE_PIXELS", 1000 * 1000)
+    # Entre MAX_IMAGE_PIXELS et le double, Pillow se contente normalement d'un avertissement
+    with pytest.raises(Image.DecompressionBombError):
+        resize_thumbnail(png((1200, 1000), mode="1"))
+    assert resize_thumbnail(png((900, 900)))[1] in ("webp", "jpg")
+    # La limite de Pillow, partagée par tout le processus, n'est pas modifiée
+    assert Image.MAX_IMAGE_PIXELS == default_limit
+
+
+def test_fetch_all_downloads_and_caches(base_url, tmp_path):
+    cache = ThumbnailCache(str(tmp_path / "thumbnails"))
+    try:
+        names = cache.fetch_all([f"{base_url}/image.png", f"{base_url}/missing.png", ""])
+    finally:
+        cache.close()
+    assert names[0] and names[0].endswith((".webp", ".jpg"))
+    assert names[1:] == [None, None]
+
+
+def test_evict_keeps_recent_unindexed_files(tmp_path):
+    cache = ThumbnailCache(str(tmp_path / "thumbnails"), max_entries=1)
+    try:
+        now = time.time()
+        for name in ("old.webp", "recent.webp"):
+            (tmp_path / "thumbnails" / name).write_bytes(b"x")
+        os.utime(cache.path("old.webp"), (now - 2 * thumbnails.EVICTION_GRACE_SECONDS,) * 2)
+        cache._db.executemany(
+            "INSERT INTO thumbnails (url, name, last_used) VALUES (?, ?, ?)",
+            [("http://a/1", "kept.webp", 2), ("http://a/2", "gone.webp", 1)],
+        )
+        assert cache.evict(now=now) == 1
+    finally:
+        cache.close()
+    assert sorted(os.listdir(tmp_path / "thumbnails")) == ["index.sqlite3", "recent.webp"]
+
+
+def test_export_skips_files_removed_from_the_cache(tmp_path):
+    cache = ThumbnailCache(str(tmp_path / "thumbnails"))
+    try:
+        (tmp_path / "thumbnails" / "present.webp").write_bytes(b"x")
+        paths = cache.export(["present.webp", "removed.webp"], str(tmp_path / "site"))
+    finally:
+        cache.close()
+    assert [os.path.basename(path) for path in paths] == ["present.webp"]